@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.runner import benchmark
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _python(code):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return lambda: subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+@benchmark("import/interpreter", sizes=None)
+def import_interpreter(ctx, rows):
+    return _python("pass")
+
+
+@benchmark("import/homework.patient", sizes=None)
+def import_patient(ctx, rows):
+    return _python("import homework.patient")
@@ -0,0 +1,47 @@
+from benchmarks.datasets import FIRST_NAMES, LAST_NAMES, records
+from benchmarks.runner import benchmark
+from benchmarks.stub_server import names_server
+from homework import names
+from homework.patient import Patient
+
+
+def _intake(rows, make_backend):
+    data = list(records(rows))
+
+    def run():
+        previous = names._backend
+        names.set_backend(make_backend())
+        try:
+            for record in data:
+                Patient(*record)
+        finally:
+            names.set_backend(previous)
+    return run
+
+
+@benchmark("intake/trusted")
+def intake_trusted(ctx, rows):
+    doc_types = Patient._INVERTED_DOCUMENT_TYPES
+    data = [(*record[:4], doc_types[record[4]], record[5]) for record in records(rows)]
+
+    def run():
+        for record in data:
+            Patient._from_trusted_row(*record)
+    return run
+
+
+@benchmark("intake/checked-offline", sizes=(1_000, 10_000))
+def intake_offline(ctx, rows):
+    return _intake(rows, lambda: names.OfflineNameBackend(FIRST_NAMES, LAST_NAMES))
+
+
+@benchmark("intake/checked-http", sizes=(1_000,))
+def intake_http(ctx, rows):
+    ctx.resource("names_server", names_server)
+    return _intake(rows, names.OnlineNameBackend)
+
+
+@benchmark("intake/checked-http-cached", sizes=(1_000, 10_000))
+def intake_http_cached(ctx, rows):
+    ctx.resource("names_server", names_server)
+    return _intake(rows, lambda: names.CachedNameBackend(names.OnlineNameBackend()))
@@ -0,0 +1,27 @@
+from benchmarks.datasets import csv_path
+from benchmarks.runner import benchmark
+from homework.patient import PatientCollection
+
+
+@benchmark("load/standard")
+def load_standard(ctx, rows):
+    path = csv_path(rows)
+    return lambda: PatientCollection(path, by_pandas=False)
+
+
+@benchmark("load/pandas")
+def load_pandas(ctx, rows):
+    path = csv_path(rows)
+    return lambda: PatientCollection(path, by_pandas=True)
+
+
+@benchmark("load/columnar")
+def load_columnar(ctx, rows):
+    path = csv_path(rows)
+    return lambda: PatientCollection(path, storage="columnar")
+
+
+@benchmark("load/parallel")
+def load_parallel(ctx, rows):
+    path = csv_path(rows)
+    return lambda: PatientCollection(path, storage="columnar", workers=None)
@@ -0,0 +1,37 @@
+from collections import deque
+
+from benchmarks.datasets import csv_path
+from benchmarks.runner import benchmark
+from homework import chart
+from homework.patient import PatientCollection
+
+
+@benchmark("query/limit")
+def query_limit(ctx, rows):
+    collection = PatientCollection(csv_path(rows), storage="file")
+    return lambda: deque(collection.limit(rows), maxlen=0)
+
+
+@benchmark("query/limit-offset")
+def query_limit_offset(ctx, rows):
+    collection = PatientCollection(csv_path(rows), storage="file")
+    deque(collection.limit(1, rows // 2), maxlen=0)
+    return lambda: deque(collection.limit(100, rows // 2), maxlen=0)
+
+
+@benchmark("chart/cold")
+def chart_cold(ctx, rows):
+    collection = PatientCollection(csv_path(rows))
+
+    def run():
+        collection._stats = None
+        chart.RENDERER.clear()
+        collection.get_statistical_chart(ctx.path("chart"))
+    return run
+
+
+@benchmark("chart/cached", sizes=(1_000,))
+def chart_cached(ctx, rows):
+    collection = PatientCollection(csv_path(rows))
+    collection.get_statistical_chart(ctx.path("chart"))
+    return lambda: collection.get_statistical_chart(ctx.path("chart"))
@@ -0,0 +1,51 @@
+import itertools
+import os
+
+from benchmarks.datasets import csv_path, records
+from benchmarks.runner import benchmark
+from homework.patient import Patient, PatientCollection
+
+_runs = itertools.count()
+
+
+def _patients(rows):
+    doc_types = Patient._INVERTED_DOCUMENT_TYPES
+    return [Patient._from_trusted_row(*record[:4], doc_types[record[4]], record[5]) for record in records(rows)]
+
+
+def _save_each(ctx, rows, save):
+    patients = _patients(rows)
+
+    def run():
+        path = ctx.path(f"save_{next(_runs)}.csv")
+        open(path, 'w').close()
+        for patient in patients:
+            save(patient, path)
+        os.remove(path)
+    return run
+
+
+@benchmark("save/standard", sizes=(1_000, 10_000))
+def save_standard(ctx, rows):
+    return _save_each(ctx, rows, Patient._save_by_standard)
+
+
+@benchmark("save/pandas", sizes=(1_000,))
+def save_pandas(ctx, rows):
+    return _save_each(ctx, rows, Patient._save_by_pandas)
+
+
+@benchmark("save/writer", sizes=(1_000, 10_000))
+def save_writer(ctx, rows):
+    return _save_each(ctx, rows, Patient.save)
+
+
+@benchmark("save/save_all")
+def save_all(ctx, rows):
+    collection = PatientCollection(csv_path(rows))
+
+    def run():
+        path = ctx.path(f"save_{next(_runs)}.csv")
+        collection.save_all(path)
+        os.remove(path)
+    return run
@@ -0,0 +1,43 @@
+import os
+import random
+
+from homework.config import PASSPORT_TYPE, INTERNATIONAL_PASSPORT_TYPE, DRIVER_LICENSE_TYPE
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data")
+
+FIRST_NAMES = ("Кондрат", "Евпатий", "Ада", "Миртл", "Евлампия", "Кузя", "Гарри", "Рон", "Билл",
+               "Владимир", "Фёдор", "Мария", "Анна", "Ольга", "Пётр", "Иван", "Нина", "Глеб")
+LAST_NAMES = ("Рюрик", "Коловрат", "Лавлейс", "Плакса", "Кузьмин", "Поттер", "Уизли", "Гейтс",
+              "Достоевский", "Иванов", "Петров", "Сидоров", "Смирнов", "Орлов", "Лебедев", "Волков")
+DOCUMENTS = ((PASSPORT_TYPE, "{:04d} {:06d}", 10_000, 1_000_000),
+             (INTERNATIONAL_PASSPORT_TYPE, "{:02d} {:07d}", 100, 10_000_000),
+             (DRIVER_LICENSE_TYPE, "{:02d} {:02d} {:06d}", 100, 100, 1_000_000))
+STATUSES = ("Болен", "Болен", "Болен", "Выздоровел", "Умер")
+
+
+def records(count, seed=0):
+    """Корректные записи пациентов: (имя, фамилия, дата рождения, телефон, тип и номер документа)."""
+    rnd = random.Random(seed)
+    for _ in range(count):
+        doc_type, doc_format, *limits = rnd.choice(DOCUMENTS)
+        yield (rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES),
+               f"{rnd.randint(1920, 2020)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+               f"+7({rnd.randint(900, 999)}){rnd.randint(0, 999):03d}-"
+               f"{rnd.randint(0, 99):02d}-{rnd.randint(0, 99):02d}",
+               doc_type, doc_format.format(*(rnd.randrange(limit) for limit in limits)))
+
+
+def csv_path(count, seed=0):
+    """Путь к сгенерированному DB.csv на count записей (файл создаётся один раз)."""
+    path = os.path.join(DATA_DIR, f"patients_{count}_{seed}.csv")
+    if not os.path.exists(path):
+        from homework.writer import HEADER
+
+        os.makedirs(DATA_DIR, exist_ok=True)
+        rnd = random.Random(seed)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(HEADER)
+            f.writelines(f"{','.join(record)},{rnd.choice(STATUSES)}\n" for record in records(count, seed))
+        os.replace(path + ".tmp", path)
+    return path
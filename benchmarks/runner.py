@@ -0,0 +1,160 @@
+import argparse
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import NamedTuple
+
+from benchmarks.datasets import SIZES
+
+BENCH_MODULES = ("bench_intake", "bench_save", "bench_load", "bench_query", "bench_import")
+DEFAULT_MAX_ROWS = 100_000
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: object
+    sizes: tuple
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, sizes=SIZES):
+    """Регистрирует бенчмарк.
+
+    setup(ctx, rows) готовит данные (не замеряется) и возвращает функцию,
+    время работы которой замеряется. sizes=None - бенчмарк без размера.
+    """
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, setup, sizes))
+        return setup
+    return decorator
+
+
+class Context:
+    """Общее состояние прогона: рабочий каталог и ресурсы, живущие до его конца."""
+
+    def __init__(self, workdir, stack):
+        self.workdir = workdir
+        self._stack = stack
+        self._resources = {}
+
+    def resource(self, name, factory):
+        """Контекстный менеджер factory() входит один раз за прогон."""
+        if name not in self._resources:
+            self._resources[name] = self._stack.enter_context(factory())
+        return self._resources[name]
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+
+def measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(pattern="*", max_rows=DEFAULT_MAX_ROWS, repeat=3, verbose=True):
+    """Прогоняет подходящие под pattern бенчмарки и возвращает словарь с результатами."""
+    import importlib
+    from homework import loggers
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir, ExitStack() as stack:
+        # Логи и DB.csv по умолчанию пишутся в текущий каталог.
+        os.chdir(workdir)
+        loggers.setup_logging()
+        stack.callback(loggers.setup_logging)
+        stack.callback(os.chdir, cwd)
+        ctx = Context(workdir, stack)
+
+        for module in BENCH_MODULES:
+            importlib.import_module(f"benchmarks.{module}")
+
+        for bench in BENCHMARKS:
+            if not fnmatch.fnmatch(bench.name, pattern):
+                continue
+            for rows in bench.sizes or (None,):
+                if rows is not None and rows > max_rows:
+                    continue
+                key = bench.name if rows is None else f"{bench.name}[{rows}]"
+                func = bench.setup(ctx, rows)
+                times = measure(func, 1 if rows and rows >= 100_000 else repeat)
+
+                result = {'rows': rows, 'min': min(times), 'median': statistics.median(times),
+                          'repeat': len(times)}
+                if rows:
+                    result['rows_per_sec'] = rows / result['min']
+                results[key] = result
+                if verbose:
+                    print(f"{key:<40} {result['min']:>10.4f}s", file=sys.stderr)
+
+    return {'meta': _meta(), 'results': results}
+
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'commit': commit, 'date': datetime.datetime.now().isoformat(timespec='seconds')}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Сравнивает с прошлым прогоном: [(бенчмарк, было, стало, отношение), ...]
+       для тех, что замедлились больше чем на tolerance.
+    """
+    regressions = []
+    for key, result in results['results'].items():
+        old = baseline['results'].get(key)
+        if old:
+            ratio = result['min'] / old['min']
+            if ratio > 1 + tolerance:
+                regressions.append((key, old['min'], result['min'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Бенчмарки горячих путей homework.")
+    parser.add_argument("-k", "--pattern", default="*", help="шаблон имён бенчмарков, например 'load/*'")
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS,
+                        help=f"максимальный размер набора данных (до {SIZES[-1]})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="куда записать результаты (JSON)")
+    parser.add_argument("--baseline", help="результаты прошлого прогона (JSON) для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="допустимое замедление относительно baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, args.max_rows, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(results, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for key, old, new, ratio in regressions:
+            print(f"REGRESSION {key}: {old:.4f}s -> {new:.4f}s (x{ratio:.2f})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
@@ -0,0 +1,56 @@
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit, parse_qs
+
+from benchmarks.datasets import FIRST_NAMES, LAST_NAMES
+
+_LAST_NAMES = {name.lower() for name in LAST_NAMES}
+
+
+class NamesHandler(BaseHTTPRequestHandler):
+    """Локальная замена imenator.ru и ufolog.ru: отвечает страницами того же вида."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith("/search/"):
+            name = parse_qs(url.query)["text"][0]
+            body = f"<a>{name}</a>" if name in FIRST_NAMES else "<a>Ничего</a>"
+        else:
+            name = unquote(url.path.rsplit('/', 1)[-1])
+            body = '<span class="version-number">1</span>' if name in _LAST_NAMES else ""
+
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def names_server():
+    """Запускает сервер и подставляет его адреса в config на время работы."""
+    from homework import config
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NamesHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host = f"http://127.0.0.1:{server.server_port}"
+    urls = config.FIRST_NAME_URL, config.LAST_NAME_URL
+    config.FIRST_NAME_URL = host + "/search/?text={}"
+    config.LAST_NAME_URL = host + "/names/order/{}"
+    try:
+        yield host
+    finally:
+        config.FIRST_NAME_URL, config.LAST_NAME_URL = urls
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from homework.lazy import lazy_import
+from homework.loggers import INFO_LOG
+
+backend_agg = lazy_import("matplotlib.backends.backend_agg")
+backend_svg = lazy_import("matplotlib.backends.backend_svg")
+figure = lazy_import("matplotlib.figure")
+
+FORMATS = ('png', 'svg')
+
+TITLE = "Статистика по вирусу COVID-19"
+LABELS = ("Заражено", "Выздоровело", "Умерло")
+COLORS = ('darkred', 'forestgreen', 'dimgrey')
+
+
+def content_hash(values, fmt):
+    return hashlib.sha1(repr((tuple(values), fmt, TITLE, LABELS)).encode()).hexdigest()
+
+
+def render(values, fmt='png'):
+    """Круговая диаграмма по числу заболевших, выздоровевших и умерших.
+
+    Рисует через объектный интерфейс matplotlib (Figure + свой canvas),
+    без pyplot и его глобального состояния, поэтому безопасно вызывается
+    из рабочих потоков. Возвращает содержимое файла в виде bytes.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+
+    in_total = sum(values)
+    if not in_total:
+        raise ValueError("Nothing to chart: collection is empty")
+
+    fig = figure.Figure(figsize=(7.5, 6), facecolor='blanchedalmond')
+    if fmt == 'svg':
+        backend_svg.FigureCanvasSVG(fig)
+    else:
+        backend_agg.FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    ax.pie([val / in_total * 100 for val in values], labels=LABELS, autopct='%1.1f%%', shadow=True,
+           explode=(0, 0, 0.07), wedgeprops={'lw': 1, 'ls': '--', 'edgecolor': 'k'}, labeldistance=None,
+           colors=COLORS)
+
+    ax.set_facecolor('oldlace')
+    ax.axis('equal')
+    ax.legend()
+    ax.set_title(TITLE, fontdict={'fontsize': 16})
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """Рендерер с кэшем по содержимому: одинаковые числа не перерисовываются,
+       а уже записанный файл с тем же содержимым не перезаписывается.
+    """
+
+    def __init__(self, maxsize=16):
+        self._maxsize = maxsize
+        self._cache = OrderedDict()
+        self._written = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def render(self, values, fmt='png'):
+        key = content_hash(values, fmt)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        data = render(values, fmt)
+
+        with self._lock:
+            self.renders += 1
+            self._cache[key] = data
+            if len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._written.clear()
+
+    def save(self, values, path, fmt='png'):
+        """Пишет диаграмму в path (расширение дописывается, если его нет)
+           и возвращает итоговый путь.
+        """
+        if not os.path.splitext(path)[1]:
+            path = f"{path}.{fmt}"
+
+        key = content_hash(values, fmt)
+        with self._lock:
+            if self._written.get(path) == key and os.path.exists(path):
+                return path
+
+        data = self.render(values, fmt)
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._written[path] = key
+        INFO_LOG.info("Диаграмма сохранена: %s", path)
+        return path
+
+
+RENDERER = ChartRenderer()
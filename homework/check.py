@@ -1,28 +1,29 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from fuzzywuzzy import fuzz, process
+import functools
+from collections.abc import Mapping
 
+from homework import config, metrics, names
+from homework.lazy import lazy_import
 from homework.loggers import INFO_LOG, ERR_LOG
 
+pd = lazy_import("pandas")
+fuzz = lazy_import("fuzzywuzzy.fuzz")
+process = lazy_import("fuzzywuzzy.process")
 
-def check_first_name(first_name):
+
+@metrics.timed("check.check_first_name")
+def check_first_name(first_name, backend=None):
     if isinstance(first_name, str):
         if first_name.isalpha():
             first_name = first_name.capitalize()
 
-            page = requests.get(f"http://imenator.ru/search/?text={first_name}")
-            soup = BeautifulSoup(page.content, "html.parser")
-            all_links = soup.find_all(name='a')
-
-            for link in all_links:
-                if link.text == first_name:
-                    # Commented to pass the tests.
-                    # INFO_LOG.info(f"Имя '{first_name}' было найдено в БД!")
-                    return first_name
+            if (backend or names.get_backend()).has_first_name(first_name):
+                # Commented to pass the tests.
+                # INFO_LOG.info(f"Имя '{first_name}' было найдено в БД!")
+                pass
             else:
                 INFO_LOG.warning(f"Имя '{first_name}' не было найдено в БД!")
-                return first_name
+
+            return first_name
         else:
             ERR_LOG.error(f"Ошибка в 'имени': '{first_name}'")
             raise ValueError("The first name contains invalid characters")
@@ -31,17 +32,13 @@ def check_first_name(first_name):
         raise TypeError("A mistake was made in the first name")
 
 
-def check_last_name(last_name):
+@metrics.timed("check.check_last_name")
+def check_last_name(last_name, backend=None):
     if isinstance(last_name, str):
         if last_name.isalpha():
             last_name = last_name.capitalize()
 
-            page = requests.get(f"http://www.ufolog.ru/names/order/{last_name.lower()}")
-
-            soup = BeautifulSoup(page.content, "html.parser")
-            found = soup.find_all(name='span', attrs={'class': 'version-number'})
-
-            if found:
+            if (backend or names.get_backend()).has_last_name(last_name):
                 # Commented to pass the tests.
                 # INFO_LOG.info(f"Фамилия '{last_name}' была найдена в БД!")
                 pass
@@ -57,6 +54,7 @@ def check_last_name(last_name):
         raise TypeError("A mistake was made in the last name")
 
 
+@metrics.timed("check.check_birth_date")
 def check_birth_date(birth_date):
     if isinstance(birth_date, str):
         if not any(symbol.isalpha() for symbol in birth_date):
@@ -78,6 +76,7 @@ def convert_phone_number(num: str):
         raise ValueError("Invalid phone number")
 
 
+@metrics.timed("check.check_phone")
 def check_phone(phone):
     if not isinstance(phone, str):
         if 10_000_000_000 <= phone <= 99_999_999_999:
@@ -99,29 +98,64 @@ def get_good_doc_type(bad_doc_type):
         return False
 
 
+class DocTypeClassifier:
+    """Нечёткое распознавание типа документа с кэшем.
+
+    Одни и те же написания встречаются постоянно, поэтому результат
+    сравнения для каждой (приведённой к нижнему регистру) строки
+    запоминается: (лучший вариант, показатель, строка после смены раскладки
+    или None, если раскладку менять не пришлось).
+    """
+
+    VARIANTS = ("паспорт российский", "заграничный паспорт",
+                "водительское удостоверение, права")
+
+    def __init__(self, variants=VARIANTS, maxsize=4096):
+        self._variants = list(variants)
+        self.classify = functools.lru_cache(maxsize=maxsize)(self._classify)
+
+    @metrics.timed("check.classify")
+    def _classify(self, doc_type):
+        result = process.extractOne(doc_type, self._variants)
+        if result[1] >= 40:
+            return result[0], result[1], None
+
+        translated = eng_to_rus(doc_type)
+        result = process.extractOne(translated, self._variants)
+        return result[0], result[1], translated
+
+    def classify_many(self, doc_types):
+        """Распознаёт сразу много строк: каждая уникальная оценивается один раз."""
+        doc_types = [doc_type.lower() for doc_type in doc_types]
+        results = {doc_type: self.classify(doc_type) for doc_type in dict.fromkeys(doc_types)}
+        return [results[doc_type] for doc_type in doc_types]
+
+
+DOC_TYPE_CLASSIFIER = DocTypeClassifier()
+metrics.register_cache("doc_types", lambda: DOC_TYPE_CLASSIFIER.classify.cache_info()[:2])
+
+
+@metrics.timed("check.check_doc_type")
 def check_doc_type(doc_type):
     if isinstance(doc_type, str):
         doc_type = doc_type.lower()
-        variants = ["паспорт российский", "заграничный паспорт",
-                    "водительское удостоверение, права"]
-
-        result = process.extractOne(doc_type, variants)
+        variant, score, translated = DOC_TYPE_CLASSIFIER.classify(doc_type)
 
-        if result[1] < 40:
-            doc_type = eng_to_rus(doc_type)
-            result = process.extractOne(doc_type, variants)
-            if result[1] < 40:
-                ERR_LOG.error(f"Низкий показатель: {result[1]}% (Тип документа: '{doc_type}')")
+        if translated is not None:
+            doc_type = translated
+            if score < 40:
+                ERR_LOG.error(f"Низкий показатель: {score}% (Тип документа: '{doc_type}')")
                 raise ValueError("Invalid doc type")
-        elif result[1] < 60:
-            INFO_LOG.warning(f"Низкий показатель: {result[1]}% (Тип документа: '{doc_type}')")
+        elif score < 60:
+            INFO_LOG.warning(f"Низкий показатель: {score}% (Тип документа: '{doc_type}')")
 
-        return get_good_doc_type(result[0])
+        return get_good_doc_type(variant)
     else:
         ERR_LOG.error(f"Ошибка в doc_type: '{doc_type}'")
         raise TypeError("A mistake was made in the doc type")
 
 
+@metrics.timed("check.check_doc_id")
 def check_doc_id(doc_type, doc_id):
     if isinstance(doc_id, str):
         doc_id = ''.join(filter(str.isdigit, doc_id))
@@ -140,12 +174,13 @@ def check_doc_id(doc_type, doc_id):
     raise TypeError("A mistake was made in doc number")
 
 
+@metrics.timed("check.global_check")
 def global_check(first_name, last_name, birth_date,
-                 phone, doc_type, doc_id):
+                 phone, doc_type, doc_id, *, backend=None):
     result = dict()
 
-    result['first_name'] = check_first_name(first_name)
-    result['last_name'] = check_last_name(last_name)
+    result['first_name'] = check_first_name(first_name, backend)
+    result['last_name'] = check_last_name(last_name, backend)
     result['birth_date'] = check_birth_date(birth_date)
     result['phone'] = check_phone(phone)
     result['doc_type'] = check_doc_type(doc_type)
@@ -154,15 +189,202 @@ def global_check(first_name, last_name, birth_date,
     return result
 
 
-def eng_to_rus(string):
-    layout = dict(zip(map(ord, "qwertyuiop[]asdfghjkl;'zxcvbnm,./`"
-                               'QWERTYUIOP{}ASDFGHJKL:"ZXCVBNM<>?~'),
-                               "йцукенгшщзхъфывапролджэячсмитьбю.ё"
-                               'ЙЦУКЕНГШЩЗХЪФЫВАПРОЛДЖЭЯЧСМИТЬБЮ,Ё'))
+_RECORD_FIELDS = ('first_name', 'last_name', 'birth_date', 'phone', 'doc_type', 'doc_id')
+
+
+def _record_args(record):
+    if isinstance(record, Mapping):
+        return tuple(record[field] for field in _RECORD_FIELDS)
+    return tuple(record)
+
+
+def _safe_record_args(record):
+    """Аргументы записи или исключение, если запись не удалось разобрать."""
+    try:
+        return _record_args(record)
+    except Exception as error:
+        ERR_LOG.error("Неверная запись: %r", error)
+        return error
+
+
+def _name_pairs(args):
+    pairs = []
+    for kind, name in zip((names.FIRST_NAME, names.LAST_NAME), args[:2]):
+        if isinstance(name, str) and name.isalpha():
+            pairs.append((kind, name.capitalize()))
+    return pairs
+
+
+async def global_check_many(records, *, concurrency=None):
+    """Проверяет пачку записей, запрашивая имена и фамилии параллельно.
+
+    Каждая уникальная пара запрашивается один раз (names.prefetch),
+    global_check затем берёт ответы из полученного словаря.
+    Возвращает список той же длины: для каждой записи - словарь как у
+    global_check или исключение, из-за которого запись не прошла проверку.
+    """
+    records = [_safe_record_args(record) for record in records]
+    pairs = [pair for args in records if not isinstance(args, Exception) for pair in _name_pairs(args)]
+    found = await names.prefetch(pairs, concurrency)
+    backend = names.PrefetchedNameBackend(found)
+
+    results = []
+    for args in records:
+        if isinstance(args, Exception):
+            results.append(args)
+            continue
+
+        errors = [found[pair] for pair in _name_pairs(args) if isinstance(found[pair], Exception)]
+        if errors:
+            ERR_LOG.error("Не удалось проверить имя или фамилию: %r", errors[0])
+            results.append(errors[0])
+            continue
+
+        try:
+            results.append(global_check(*args, backend=backend))
+        except Exception as error:
+            results.append(error)
+
+    return results
+
+
+_DOC_TYPE_NAMES = {None: config.PASSPORT_TYPE,
+                   True: config.INTERNATIONAL_PASSPORT_TYPE,
+                   False: config.DRIVER_LICENSE_TYPE}
+
+
+def _is_str(column):
+    return column.map(lambda value: isinstance(value, str)).astype(bool)
 
-    return string.translate(layout)
+
+def _normalize_names(column):
+    text = column.where(_is_str(column), "")
+    valid = text.str.isalpha().fillna(False).astype(bool)
+    return text.str.capitalize().where(valid), valid
+
+
+def _normalize_birth_dates(column):
+    is_str = _is_str(column)
+    text = column.where(is_str, "")
+    valid = is_str & ~text.str.contains(r"[^\W\d_]", regex=True).fillna(True).astype(bool)
+
+    parts = text.str.extract(r"^\D*(\d{4})\D+(\d{1,2})\D+(\d{1,2})\D*$")
+    iso = parts[0] + "-" + parts[1].str.zfill(2) + "-" + parts[2].str.zfill(2)
+    dates = pd.to_datetime(iso.where(valid), format="%Y-%m-%d", errors="coerce")
+    result = dates.dt.strftime("%Y-%m-%d").where(dates.notna())
+
+    # Редкие написания, которые не разобрало регулярное выражение, -
+    # тем же парсером, что и в check_birth_date.
+    for i in result.index[valid & result.isna()]:
+        try:
+            result[i] = str(pd.to_datetime(text[i]).date())
+        except (ValueError, OverflowError):
+            pass
+
+    return result, valid & result.notna()
+
+
+def _normalize_phones(column):
+    is_str = _is_str(column)
+    numbers = pd.to_numeric(column.where(~is_str), errors="coerce")
+    valid_numbers = ~is_str & numbers.between(10_000_000_000, 99_999_999_999)
+
+    text = column.where(is_str, numbers.where(valid_numbers).map("{:.0f}".format, na_action="ignore"))
+    digits = text.str.replace(r"\D", "", regex=True)
+    valid = (is_str | valid_numbers) & (digits.str.len() == 11)
+
+    result = "+7(" + digits.str[1:4] + ")" + digits.str[4:7] + "-" + digits.str[7:9] + "-" + digits.str[9:11]
+    return result.where(valid), valid.fillna(False).astype(bool)
+
+
+def _normalize_doc_types(column):
+    is_str = _is_str(column)
+    codes = pd.Series([None] * len(column), index=column.index, dtype=object)
+    valid = is_str.copy()
+
+    strings = column[is_str]
+    for i, (variant, score, translated) in zip(strings.index, DOC_TYPE_CLASSIFIER.classify_many(strings)):
+        if translated is not None and score < 40:
+            valid[i] = False
+        else:
+            codes[i] = get_good_doc_type(variant)
+
+    return codes, valid
+
+
+def _normalize_doc_ids(column, codes, valid_types):
+    is_str = _is_str(column)
+    digits = column.where(is_str, "").str.replace(r"\D", "", regex=True)
+    length = digits.str.len()
+
+    international = valid_types & codes.map(lambda code: code is True).astype(bool)
+    passport = valid_types & codes.isna()
+    driver = valid_types & codes.map(lambda code: code is False).astype(bool)
+
+    result = pd.Series([None] * len(column), index=column.index, dtype=object)
+    mask = is_str & international & (length == 9)
+    result[mask] = digits[mask].str[:2] + " " + digits[mask].str[2:]
+    mask = is_str & passport & (length == 10)
+    result[mask] = digits[mask].str[:4] + " " + digits[mask].str[4:]
+    mask = is_str & driver & (length == 10)
+    result[mask] = digits[mask].str[:2] + " " + digits[mask].str[2:4] + " " + digits[mask].str[4:]
+
+    return result, result.notna()
+
+
+@metrics.timed("check.normalize_frame")
+def normalize_frame(df):
+    """Пакетная версия проверок для целой таблицы (или словаря столбцов).
+
+    Столбцы - как в DB.csv ('First name', 'Last name', 'Date of Birth',
+    'Phone number', 'Doc type', 'Doc number', 'Status' - необязательный).
+    Столбцы обрабатываются целиком строковыми операциями pandas и одним
+    вызовом to_datetime. Имена и фамилии проверяются только на допустимые
+    символы, без запросов в интернет.
+
+    Возвращает (очищенная таблица, маска строк с ошибками). В строках
+    с ошибками некорректные значения заменены на пропуски.
+    """
+    df = pd.DataFrame(df)
+    result = pd.DataFrame(index=df.index)
+    valid = pd.Series(True, index=df.index)
+
+    for field in ('First name', 'Last name'):
+        result[field], field_valid = _normalize_names(df[field].astype(object))
+        valid &= field_valid
+
+    result['Date of Birth'], field_valid = _normalize_birth_dates(df['Date of Birth'].astype(object))
+    valid &= field_valid
+
+    result['Phone number'], field_valid = _normalize_phones(df['Phone number'].astype(object))
+    valid &= field_valid
+
+    codes, types_valid = _normalize_doc_types(df['Doc type'].astype(object))
+    result['Doc type'] = codes.map(_DOC_TYPE_NAMES.get).where(types_valid)
+    result['Doc number'], field_valid = _normalize_doc_ids(df['Doc number'].astype(object), codes, types_valid)
+    valid &= types_valid & field_valid
+
+    if 'Status' in df:
+        result['Status'] = df['Status']
+
+    errors = ~valid
+    if errors.any():
+        ERR_LOG.error("Ошибки в строках таблицы: %s из %s", int(errors.sum()), len(errors))
+
+    return result, errors
+
+
+_LAYOUT = dict(zip(map(ord, "qwertyuiop[]asdfghjkl;'zxcvbnm,./`"
+                           'QWERTYUIOP{}ASDFGHJKL:"ZXCVBNM<>?~'),
+                           "йцукенгшщзхъфывапролджэячсмитьбю.ё"
+                           'ЙЦУКЕНГШЩЗХЪФЫВАПРОЛДЖЭЯЧСМИТЬБЮ,Ё'))
+
+
+def eng_to_rus(string):
+    return string.translate(_LAYOUT)
 
 
+@metrics.timed("check.is_typo_in_name")
 def is_typo_in_name(old_name, new_name):
     percent = fuzz.partial_ratio(old_name, new_name)
 
@@ -173,11 +395,13 @@ def is_typo_in_name(old_name, new_name):
     return percent > 59
 
 
+@metrics.timed("check.is_typo_in_date")
 def is_typo_in_date(old_date, new_date):
     percent = fuzz.partial_ratio(old_date, new_date)
     return percent > 81
 
 
+@metrics.timed("check.is_typo_in_doc_id")
 def is_typo_in_doc_id(old_id, new_id):
     percent = fuzz.partial_ratio(old_id, new_id)
     return percent > 79
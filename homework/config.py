@@ -10,4 +10,34 @@ INTERNATIONAL_PASSPORT_TYPE = "Загран. паспорт"  # тип доку
 INTERNATIONAL_PASSPORT_FORMAT = "00 0000000"  # формат хранения заграна для номера 00 0000000
 
 DRIVER_LICENSE_TYPE = "Водительские права"  # тип документа, если это водительское удостоверение
-DRIVER_LICENSE_FORMAT = "00 00 000000"  # формат хранения номера ВУ
\ No newline at end of file
+DRIVER_LICENSE_FORMAT = "00 00 000000"  # формат хранения номера ВУ
+
+# Проверка имён и фамилий
+NAME_BACKEND = "online"  # "online" - через интернет, "offline" - по локальным спискам имён
+FIRST_NAME_URL = "http://imenator.ru/search/?text={}"
+LAST_NAME_URL = "http://www.ufolog.ru/names/order/{}"
+FIRST_NAMES_FILE = "first_names.txt"  # локальный список имён (по одному на строку)
+LAST_NAMES_FILE = "last_names.txt"  # локальный список фамилий (по одному на строку)
+NAME_CACHE_SIZE = 10_000  # размер LRU-кэша результатов проверки
+NAME_CACHE_TTL = 24 * 60 * 60  # время жизни записи в кэше (секунды)
+NAME_CACHE_PATH = None  # путь к файлу постоянного кэша (None - без него)
+NAME_LOOKUP_CONCURRENCY = 16  # число одновременных запросов при пакетной проверке
+
+# Логирование
+ASYNC_LOGGING = False  # писать логи в отдельном потоке через очередь
+LOG_BATCH_SIZE = 100  # сколько записей копить перед записью в файл (при ASYNC_LOGGING)
+
+# Метрики
+METRICS_ENABLED = False  # замерять время проверок, загрузки и сохранения (homework.metrics)
+METRICS_FILE = None  # куда писать метрики в формате Prometheus при выходе (None - не писать)
+
+# Параллельная загрузка .csv (PatientCollection(..., workers=N))
+LOAD_CHUNK_SIZE = 32 * 1024 * 1024  # меньше скольких байт файл не делится между процессами
+
+# Сортировка и разбиение больших файлов
+SORT_MEMORY_BUDGET = 64 * 1024 * 1024  # сколько байт записей сортировать в памяти, остальное - через временные файлы
+PARTITION_OPEN_FILES = 64  # сколько файлов разбиения держать открытыми одновременно
+
+# Запись в DB.csv
+WRITE_FSYNC = False  # сбрасывать каждую пачку записей на диск (fsync) перед возвратом из save
+JOURNAL_COMPACT_SIZE = 1024 * 1024  # размер журнала изменений (байт), после которого он в фоне сворачивается в DB.csv (None - только вручную)
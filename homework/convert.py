@@ -0,0 +1,47 @@
+import argparse
+
+from homework.patient import PatientCollection
+
+
+def csv_to_npz(csv_path, npz_path):
+    collection = PatientCollection(csv_path, storage="columnar")
+    collection.save_npz(npz_path)
+    return len(collection)
+
+
+def npz_to_csv(npz_path, csv_path, *, where=None):
+    """Дописывает записи из .npz в .csv (заголовок пишется, только если файл пуст)."""
+    collection = PatientCollection.from_npz(npz_path, where=where)
+    collection.save_all(csv_path)
+    return len(collection)
+
+
+def csv_to_sqlite(csv_path, db_path):
+    """Дописывает записи из .csv в базу SQLite."""
+    with PatientCollection(db_path, storage="sqlite") as collection:
+        return collection.add_from_csv(csv_path)
+
+
+def sqlite_to_csv(db_path, csv_path):
+    with PatientCollection(db_path, storage="sqlite") as collection:
+        collection.save_all(csv_path)
+        return len(collection)
+
+
+_CONVERTERS = {"csv2npz": csv_to_npz, "npz2csv": npz_to_csv,
+               "csv2sqlite": csv_to_sqlite, "sqlite2csv": sqlite_to_csv}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m homework.convert",
+                                     description="Перевод базы пациентов между .csv, .npz и SQLite.")
+    parser.add_argument("direction", choices=list(_CONVERTERS))
+    parser.add_argument("source")
+    parser.add_argument("target")
+    args = parser.parse_args(argv)
+
+    print(f"Записей: {_CONVERTERS[args.direction](args.source, args.target)}")
+
+
+if __name__ == '__main__':
+    main()
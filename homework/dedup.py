@@ -0,0 +1,124 @@
+import functools
+import zlib
+from collections import defaultdict
+from itertools import combinations
+
+import homework.check as check
+from homework.indexes import phone_key, document_key
+
+_PHONETIC_GROUPS = ("бп", "вф", "гкх", "дт", "жшщч", "зсц", "л", "мн", "р",
+                    "bp", "vf", "gkhq", "dt", "jx", "zsc", "l", "mn", "r")
+_PHONETIC = {letter: str(i % 9) for i, group in enumerate(_PHONETIC_GROUPS) for letter in group}
+
+_NUM_HASHES = 16
+_BAND_SIZE = 4
+_SEEDS = [f"{i}:".encode() for i in range(_NUM_HASHES)]
+
+
+def phonetic_key(name, length=4):
+    """Ключ фамилии по созвучию: согласные, похожие по звучанию, совпадают,
+       гласные не учитываются (как в Soundex).
+    """
+    name = check.eng_to_rus(name).casefold() if name.isascii() else name.casefold()
+    key = name[:1]
+    last = _PHONETIC.get(key)
+    for letter in name[1:]:
+        code = _PHONETIC.get(letter)
+        if code is not None and code != last:
+            key += code
+            if len(key) == length:
+                break
+        last = code
+    return key
+
+
+def _shingles(text, n=3):
+    text = f" {text.casefold()} "
+    return {text[i:i + n].encode() for i in range(len(text) - n + 1)}
+
+
+def minhash(text):
+    shingles = _shingles(text)
+    return tuple(min(zlib.crc32(seed + shingle) for shingle in shingles) for seed in _SEEDS)
+
+
+def candidate_pairs(records, max_block=1000):
+    """Пары записей, которые стоит сравнить: попавшие в один блок.
+
+    Блоки: созвучная фамилия + год рождения, MinHash-корзины по
+    триграммам полного имени (в пределах десятилетия рождения),
+    одинаковый телефон и одинаковый документ. Блоки больше max_block
+    пропускаются - такой ключ ничего не говорит о сходстве.
+
+    Пары выдаются по блокам, без общего множества всех пар: пара,
+    попавшая в несколько блоков, выдаётся только в первом из общих.
+    """
+    blocks = defaultdict(list)
+
+    for row, (first_name, last_name, birth_date, phone, doc_type, doc_id) in enumerate(records):
+        birth_year = str(birth_date)[:4]
+        blocks[('name', phonetic_key(last_name), birth_year)].append(row)
+        blocks[('phone', phone_key(phone))].append(row)
+        blocks[('doc', document_key(doc_type, doc_id))].append(row)
+
+        signature = minhash(f"{last_name} {first_name}")
+        for band in range(0, _NUM_HASHES, _BAND_SIZE):
+            blocks[('lsh', band, birth_year[:3], signature[band:band + _BAND_SIZE])].append(row)
+
+    blocks = [rows for rows in blocks.values() if 1 < len(rows) <= max_block]
+    row_blocks = defaultdict(list)
+    for block, rows in enumerate(blocks):
+        for row in rows:
+            row_blocks[row].append(block)
+
+    for block, rows in enumerate(blocks):
+        for first, second in combinations(rows, 2):
+            # Пара выдаётся в общем блоке с наименьшим номером.
+            second_blocks = row_blocks[second]
+            if not any(other < block and other in second_blocks for other in row_blocks[first]):
+                yield first, second
+
+
+def is_duplicate(first, second, is_typo_in_name=check.is_typo_in_name):
+    first_name, last_name, birth_date, phone, doc_type, doc_id = first
+    other_first_name, other_last_name, other_birth_date, other_phone, other_doc_type, other_doc_id = second
+
+    document = document_key(doc_type, doc_id)
+    if document[1] and document == document_key(other_doc_type, other_doc_id):
+        return True
+
+    if not (is_typo_in_name(last_name, other_last_name) and
+            is_typo_in_name(first_name, other_first_name)):
+        return False
+
+    return check.is_typo_in_date(str(birth_date), str(other_birth_date)) or \
+        phone_key(phone) == phone_key(other_phone)
+
+
+def find_duplicates(records, max_block=1000):
+    """Группы номеров записей, похожих на одного и того же пациента.
+
+    records - последовательность (имя, фамилия, дата рождения, телефон,
+    тип документа, номер документа). Пороги опечаток те же, что при
+    изменении полей пациента (check.is_typo_in_*).
+    """
+    records = list(records)
+    parent = list(range(len(records)))
+
+    def find(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    # Одни и те же пары имён встречаются в блоках много раз.
+    is_typo_in_name = functools.lru_cache(maxsize=1 << 16)(check.is_typo_in_name)
+
+    for first, second in candidate_pairs(records, max_block):
+        if find(first) != find(second) and is_duplicate(records[first], records[second], is_typo_in_name):
+            parent[max(find(first), find(second))] = min(find(first), find(second))
+
+    groups = defaultdict(list)
+    for row in range(len(records)):
+        groups[find(row)].append(row)
+    return [rows for rows in groups.values() if len(rows) > 1]
@@ -0,0 +1,151 @@
+import heapq
+import os
+import tempfile
+from collections import OrderedDict
+from contextlib import ExitStack
+
+from homework import config
+from homework.loggers import INFO_LOG
+from homework.query import FIELDS, _field_index
+from homework.writer import HEADER
+
+# Примерные накладные расходы на одну строку в памяти: объект bytes, ключ, место в списке.
+_LINE_OVERHEAD = 120
+_MAX_FAN_IN = 64
+_NAME_FIELDS = (FIELDS.index('first_name'), FIELDS.index('last_name'))
+
+
+def sort_key(fields):
+    """Ключ сортировки строки .csv по полям fields (имя поля или кортеж имён).
+
+    Имена и фамилии сравниваются без учёта регистра, остальные поля - как
+    строки (даты рождения хранятся как ГГГГ-ММ-ДД, так что это порядок дат).
+    """
+    if isinstance(fields, str):
+        fields = (fields,)
+    indexes = tuple(_field_index(name) for name in fields)
+
+    def key(line):
+        parts = line.split(b',')
+        return tuple(parts[i].decode('utf-8').casefold() if i in _NAME_FIELDS else parts[i] for i in indexes)
+    return key
+
+
+def _write_run(lines, directory):
+    fd, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        f.writelines(line + b'\n' for line in lines)
+    return path
+
+
+def _read_run(f):
+    for line in f:
+        yield line.rstrip(b'\n')
+
+
+def _merge(paths, key, reverse, stack):
+    files = [stack.enter_context(open(path, 'rb')) for path in paths]
+    return heapq.merge(*(_read_run(f) for f in files), key=key, reverse=reverse)
+
+
+def sort_lines(lines, key, path, *, reverse=False, memory_budget=None):
+    """Пишет строки в path (с заголовком) в порядке key - внешней сортировкой слиянием.
+
+    В памяти одновременно сортируется не больше memory_budget байт
+    (по умолчанию config.SORT_MEMORY_BUDGET), каждая такая порция пишется
+    во временный файл, затем порции сливаются. Если порций больше
+    _MAX_FAN_IN, они сливаются в несколько проходов.
+    Возвращает число записанных строк.
+    """
+    memory_budget = config.SORT_MEMORY_BUDGET if memory_budget is None else memory_budget
+    directory = os.path.dirname(os.path.abspath(path))
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp_dir:
+        runs, run, size, count = [], [], 0, 0
+        for line in lines:
+            run.append(line)
+            size += len(line) + _LINE_OVERHEAD
+            count += 1
+            if size >= memory_budget:
+                run.sort(key=key, reverse=reverse)
+                runs.append(_write_run(run, tmp_dir))
+                run, size = [], 0
+        run.sort(key=key, reverse=reverse)
+
+        while len(runs) > _MAX_FAN_IN:
+            merged = []
+            for i in range(0, len(runs), _MAX_FAN_IN):
+                with ExitStack() as stack:
+                    merged.append(_write_run(_merge(runs[i:i + _MAX_FAN_IN], key, reverse, stack), tmp_dir))
+                for run_path in runs[i:i + _MAX_FAN_IN]:
+                    os.remove(run_path)
+            runs = merged
+
+        with ExitStack() as stack:
+            ordered = run
+            if runs:
+                ordered = heapq.merge(_merge(runs, key, reverse, stack), run, key=key, reverse=reverse)
+            with open(path, 'wb') as f:
+                f.write(HEADER.encode('utf-8'))
+                f.writelines(line + b'\n' for line in ordered)
+
+    INFO_LOG.info("Отсортировано записей: %s (временных файлов: %s) -> '%s'", count, len(runs), path)
+    return count
+
+
+def partition_value(field):
+    """Функция строки .csv -> значение, по которому она попадает в свой файл.
+
+    field - имя поля (см. homework.query.FIELDS) или 'birth_year'.
+    """
+    if field == 'birth_year':
+        i = FIELDS.index('birth_date')
+        return lambda line: line.split(b',')[i][:4].decode('utf-8')
+    i = _field_index(field)
+    return lambda line: line.split(b',')[i].decode('utf-8')
+
+
+def _partition_path(directory, stem, value):
+    value = value.replace(os.sep, '_').replace('\0', '_') or '_'
+    return os.path.join(directory, f"{stem}_{value}.csv")
+
+
+def partition_lines(lines, field, directory, stem='DB', max_open=None):
+    """Раскладывает строки по файлам directory/{stem}_{значение}.csv за один проход.
+
+    Каждый файл создаётся при первой его строке и получает заголовок.
+    Открытыми держатся не больше max_open файлов (по умолчанию
+    config.PARTITION_OPEN_FILES): давно не нужный закрывается и при
+    следующей строке открывается снова на дозапись, так что значений
+    может быть сколько угодно.
+    Возвращает {значение: путь к файлу}.
+    """
+    max_open = config.PARTITION_OPEN_FILES if max_open is None else max_open
+    value_of = partition_value(field)
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    files = OrderedDict()
+
+    try:
+        for line in lines:
+            value = value_of(line)
+            f = files.get(value)
+            if f is None:
+                if len(files) >= max(max_open, 1):
+                    files.popitem(last=False)[1].close()
+                if value in paths:
+                    f = open(paths[value], 'ab')
+                else:
+                    paths[value] = _partition_path(directory, stem, value)
+                    f = open(paths[value], 'wb')
+                    f.write(HEADER.encode('utf-8'))
+                files[value] = f
+            else:
+                files.move_to_end(value)
+            f.write(line + b'\n')
+    finally:
+        for f in files.values():
+            f.close()
+
+    INFO_LOG.info("Записи разбиты по '%s' на %s файлов в '%s'", field, len(paths), directory)
+    return paths
@@ -0,0 +1,85 @@
+from bisect import bisect_left, insort
+
+
+def phone_key(phone):
+    """Последние 10 цифр номера: +7(916)... и 8(916)... - один и тот же телефон."""
+    return ''.join(filter(str.isdigit, str(phone)))[-10:]
+
+
+def document_key(doc_type, doc_id):
+    return doc_type, ''.join(filter(str.isdigit, str(doc_id)))
+
+
+def last_name_key(last_name):
+    return str(last_name).casefold()
+
+
+class PatientIndexes:
+    """Индексы по телефону, документу и фамилии - номера записей в коллекции."""
+
+    def __init__(self):
+        self._by_phone = {}
+        self._by_document = {}
+        self._last_names = []
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, row, patient):
+        insort(self._last_names, (self._add_keys(row, patient), row))
+
+    def add_many(self, patients):
+        """Пачка (номер, пациент). В пустой индекс фамилии дописываются и сортируются
+           один раз, а не вставляются по одной (это квадратично на больших коллекциях).
+        """
+        if self._last_names:
+            for row, patient in patients:
+                self.add(row, patient)
+            return
+
+        self._last_names.extend((self._add_keys(row, patient), row) for row, patient in patients)
+        self._last_names.sort()
+
+    def _add_keys(self, row, patient):
+        """Добавляет запись в индексы по телефону и документу, возвращает ключ фамилии."""
+        keys = (phone_key(patient._phone), document_key(*patient._document), last_name_key(patient._last_name))
+        self._keys[row] = keys
+        self._by_phone.setdefault(keys[0], []).append(row)
+        self._by_document.setdefault(keys[1], []).append(row)
+        return keys[2]
+
+    def update(self, row, patient):
+        if row in self._keys:
+            self._remove(row)
+            self.add(row, patient)
+
+    def _remove(self, row):
+        phone, document, last_name = self._keys.pop(row)
+        _discard(self._by_phone, phone, row)
+        _discard(self._by_document, document, row)
+        del self._last_names[bisect_left(self._last_names, (last_name, row))]
+
+    def find_by_phone(self, phone):
+        return list(self._by_phone.get(phone_key(phone), ()))
+
+    def find_by_document(self, doc_type, doc_id):
+        return list(self._by_document.get(document_key(doc_type, doc_id), ()))
+
+    def find_by_last_name(self, last_name, prefix=False):
+        key = last_name_key(last_name)
+        rows = []
+        for i in range(bisect_left(self._last_names, (key,)), len(self._last_names)):
+            name, row = self._last_names[i]
+            if name == key or (prefix and name.startswith(key)):
+                rows.append(row)
+            else:
+                break
+        return sorted(rows)
+
+
+def _discard(index, key, row):
+    rows = index[key]
+    rows.remove(row)
+    if not rows:
+        del index[key]
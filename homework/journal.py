@@ -0,0 +1,192 @@
+import os
+import stat
+import tempfile
+import threading
+from contextlib import suppress
+
+from homework import config, metrics
+from homework.loggers import INFO_LOG, ERR_LOG
+from homework.query import FIELDS
+from homework.reader import iter_rows
+from homework.writer import locked_open, write_all
+
+_TAIL_SIZE = 4096
+
+
+class Journal:
+    """Журнал изменений записей .csv, хранящийся рядом с файлом (DB.csv.journal).
+
+    Изменение пациента дописывается в журнал строкой "номер записи,поле,значение",
+    сам .csv при этом не переписывается. При загрузке коллекции изменения
+    накладываются на прочитанные записи (действует последнее значение поля).
+    Когда журнал дорастает до config.JOURNAL_COMPACT_SIZE байт, он в фоновом
+    потоке сворачивается: изменения переносятся в .csv, журнал очищается.
+    """
+
+    def __init__(self, csv_path, journal_path=None):
+        self._csv_path = csv_path
+        self._path = journal_path or csv_path + ".journal"
+        try:
+            with open(self._path, 'rb') as f:
+                self._changes = _parse(f.read())
+        except FileNotFoundError:
+            self._changes = {}
+        self._compacting = None
+        self._compact_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+
+    @property
+    def changes(self):
+        """{номер записи: {номер поля: значение}} - изменения, известные этому журналу."""
+        return self._changes
+
+    @metrics.timed("journal.record")
+    def record(self, row, patient, fields):
+        """Дописывает в журнал новые значения полей fields (имена из homework.query.FIELDS)."""
+        values = patient._to_csv_line().rstrip('\n').split(',')
+        changes = self._changes.setdefault(row, {})
+        lines = []
+        for name in fields:
+            i = FIELDS.index(name)
+            changes[i] = values[i]
+            lines.append(f"{row},{name},{values[i]}\n")
+
+        size = _append(self._path, ''.join(lines).encode('utf-8'))
+        if config.JOURNAL_COMPACT_SIZE is not None and size >= config.JOURNAL_COMPACT_SIZE:
+            self.compact_in_background()
+
+    def patch(self, row, fields):
+        """Поля записи (список строк) с наложенными изменениями."""
+        changes = self._changes.get(row)
+        if changes and len(fields) == len(FIELDS):
+            fields = list(fields)
+            for i, value in changes.items():
+                fields[i] = value
+        return fields
+
+    def patch_line(self, row, line):
+        """Строка записи (bytes, без перевода строки) с наложенными изменениями."""
+        return _patch_line(self._changes.get(row), line.rstrip(b'\r\n'))
+
+    @metrics.timed("journal.compact")
+    def compact(self):
+        """Переносит изменения из журнала в .csv и очищает журнал.
+
+        .csv переписывается во временный файл, который затем подменяет его
+        (os.replace). Блокировка .csv держится всё это время, так что запись
+        в .csv ждёт окончания, а запись в журнал - нет: то, что попало
+        в журнал во время сворачивания, в нём и остаётся.
+        Возвращает число изменённых записей.
+        """
+        with self._compact_lock, locked_open(self._csv_path, 'rb') as base:
+            with locked_open(self._path, 'a+b') as f:
+                f.seek(0)
+                data = f.read()
+
+            changes = _parse(data)
+            if changes:
+                self._rewrite(base, changes)
+            self._drop(len(data))
+
+        INFO_LOG.info("Журнал '%s' свёрнут в '%s', изменено записей: %s", self._path, self._csv_path, len(changes))
+        return len(changes)
+
+    def _rewrite(self, base, changes):
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(self._csv_path)))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(base.readline())
+                for row, line in enumerate(iter_rows(self._csv_path)):
+                    out.write(_patch_line(changes.get(row), line.line()) + b'\n')
+                out.flush()
+                os.fsync(out.fileno())
+            os.chmod(tmp_path, stat.S_IMODE(os.fstat(base.fileno()).st_mode))
+            os.replace(tmp_path, self._csv_path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+
+        # Смещения строк изменились: индекс рядом с файлом больше не годится.
+        with suppress(FileNotFoundError):
+            os.remove(self._csv_path + ".idx")
+
+    def _drop(self, size):
+        """Убирает из журнала первые size байт (уже перенесённые в .csv)."""
+        with locked_open(self._path, 'r+b') as f:
+            f.seek(size)
+            tail = f.read()
+            if not tail:
+                f.truncate(0)
+                return
+
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(os.path.abspath(self._path)))
+            with os.fdopen(fd, 'wb') as out:
+                out.write(tail)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self._path)
+
+    def compact_in_background(self):
+        """Запускает compact в фоновом потоке, если он ещё не запущен."""
+        with self._thread_lock:
+            if self._compacting is None or not self._compacting.is_alive():
+                self._compacting = threading.Thread(target=self._compact_logged, name="journal-compaction")
+                self._compacting.start()
+            return self._compacting
+
+    def wait(self):
+        """Ждёт окончания фонового сворачивания."""
+        thread = self._compacting
+        if thread is not None:
+            thread.join()
+
+    def _compact_logged(self):
+        try:
+            self.compact()
+        except Exception as error:
+            ERR_LOG.error("Не удалось свернуть журнал '%s': %s", self._path, error)
+
+
+def _patch_line(changes, line):
+    if not changes:
+        return line
+    fields = line.split(b',')
+    if len(fields) != len(FIELDS):
+        return line
+    for i, value in changes.items():
+        fields[i] = value.encode('utf-8')
+    return b','.join(fields)
+
+
+def _parse(data):
+    """Изменения из содержимого журнала. Недописанная последняя строка пропускается."""
+    changes = {}
+    for line in data.split(b'\n')[:-1]:
+        parts = line.decode('utf-8', 'replace').split(',')
+        if len(parts) != 3 or not parts[0].isdigit() or parts[1] not in FIELDS:
+            continue
+        changes.setdefault(int(parts[0]), {})[FIELDS.index(parts[1])] = parts[2]
+    return changes
+
+
+def _append(path, data):
+    """Дописывает строки в журнал под блокировкой, возвращает новый размер журнала.
+
+    Если предыдущая запись оборвалась посреди строки (процесс упал),
+    обрывок сначала отрезается.
+    """
+    with locked_open(path, 'a+b') as f:
+        fd = f.fileno()
+        size = os.fstat(fd).st_size
+        if size:
+            f.seek(max(0, size - _TAIL_SIZE))
+            tail = f.read()
+            if not tail.endswith(b'\n'):
+                size -= len(tail) - tail.rfind(b'\n') - 1
+                os.ftruncate(fd, size)
+
+        write_all(fd, data)
+        if config.WRITE_FSYNC:
+            os.fsync(fd)
+        return size + len(data)
@@ -0,0 +1,34 @@
+import importlib
+import sys
+
+
+class LazyModule:
+    """Модуль, который импортируется при первом обращении к его атрибуту.
+
+    После импорта атрибуты модуля копируются в сам объект, так что
+    дальнейшие обращения не дороже, чем к обычному модулю.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._lazy_name)
+        if '_lazy_module' not in self.__dict__:
+            self.__dict__.update(module.__dict__)
+            self.__dict__['_lazy_module'] = module
+        return getattr(module, attr)
+
+    def __setattr__(self, attr, value):
+        setattr(importlib.import_module(self._lazy_name), attr, value)
+        self.__dict__[attr] = value
+
+    def __repr__(self):
+        return f"<lazy module '{self._lazy_name}'>"
+
+
+def lazy_import(name):
+    """import name, отложенный до первого использования."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
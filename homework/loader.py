@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+from homework import config
+from homework.reader import iter_rows
+from homework.storage import ColumnarStorage
+
+_NAME_COLUMNS = ('first_name', 'last_name')
+_PACKED_COLUMNS = ('birth_date', 'phone', 'doc_type', 'doc_id', 'status')
+
+
+def byte_ranges(path, parts, min_size=None):
+    """Делит записи .csv (без заголовка) на не больше parts кусков [начало, конец).
+
+    Границы сдвигаются к началу следующей строки, так что каждая строка
+    целиком попадает ровно в один кусок. Куски меньше min_size байт
+    (по умолчанию config.LOAD_CHUNK_SIZE) не делаются: маленький файл
+    остаётся одним куском.
+    """
+    min_size = config.LOAD_CHUNK_SIZE if min_size is None else min_size
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        end = os.fstat(f.fileno()).st_size
+        if start >= end:
+            return []
+
+        parts = max(1, min(parts, (end - start) // max(min_size, 1)))
+        bounds = [start]
+        for i in range(1, parts):
+            f.seek(start + (end - start) * i // parts - 1)
+            f.readline()
+            if bounds[-1] < f.tell() < end:
+                bounds.append(f.tell())
+        bounds.append(end)
+
+    return list(zip(bounds, bounds[1:]))
+
+
+def parse_range(path, start, stop, doc_types, statuses):
+    """Разбирает строки .csv из [start, stop) в упакованные столбцы.
+
+    Возвращает ({столбец: bytes}, [((строка, поле), значение), ...], число строк):
+    имена - одной строкой через '\\n', остальные столбцы - байтами массивов,
+    как в ColumnarStorage. Так результат передаётся между процессами
+    одним куском на столбец, а не объектом на каждую запись.
+    """
+    storage = ColumnarStorage(None)
+    append_fields = storage.append_fields
+
+    for row in iter_rows(path, start, stop):
+        first_name, last_name, birth_date, phone, doc_type, doc_id, status = row.fields()
+        append_fields(first_name, last_name, birth_date, phone,
+                      doc_types[doc_type], doc_id, statuses[status])
+
+    columns, raw = storage.columns()
+    packed = {column: '\n'.join(columns[column]).encode('utf-8') for column in _NAME_COLUMNS}
+    packed.update((column, columns[column].tobytes()) for column in _PACKED_COLUMNS)
+    return packed, list(raw.items()), len(storage)
+
+
+def _unpack(packed, count):
+    columns = dict(packed)
+    for column in _NAME_COLUMNS:
+        columns[column] = packed[column].decode('utf-8').split('\n') if count else []
+    return columns
+
+
+def load_columns(path, storage, doc_types, statuses, workers=None):
+    """Загружает .csv в ColumnarStorage, разбирая куски файла в workers процессах.
+
+    doc_types и statuses - {как в .csv: внутреннее значение}. Куски
+    дописываются в storage по порядку, так что номера записей совпадают
+    с порядком строк в файле. Если кусок один, он разбирается в этом процессе.
+    """
+    ranges = byte_ranges(path, workers or os.cpu_count() or 1)
+    args = ([path] * len(ranges), [start for start, stop in ranges], [stop for start, stop in ranges],
+            [doc_types] * len(ranges), [statuses] * len(ranges))
+
+    with ExitStack() as stack:
+        if len(ranges) > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=len(ranges)))
+            batches = executor.map(parse_range, *args)
+        else:
+            batches = map(parse_range, *args)
+
+        for packed, raw, count in batches:
+            storage.extend_columns(_unpack(packed, count), raw)
+    return storage
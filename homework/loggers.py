@@ -1,4 +1,9 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from homework import config
 
 
 INFO_LOG = logging.getLogger('info_log')
@@ -8,10 +13,102 @@ ERR_LOG.setLevel(logging.ERROR)
 
 formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
 
-good_fh = logging.FileHandler("info.log", mode='a')
-good_fh.setFormatter(formatter)
-err_fh = logging.FileHandler("errors.log", mode='a')
-err_fh.setFormatter(formatter)
 
-INFO_LOG.addHandler(good_fh)
-ERR_LOG.addHandler(err_fh)
\ No newline at end of file
+class BatchingFileHandler(logging.FileHandler):
+    """Копит отформатированные записи и пишет их в файл одним вызовом."""
+
+    def __init__(self, filename, batch_size=100, mode='a', encoding='utf-8', delay=True):
+        super().__init__(filename, mode, encoding=encoding, delay=delay)
+        self._batch_size = batch_size
+        self._batch = []
+
+    def emit(self, record):
+        try:
+            self._batch.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._batch:
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(''.join(self._batch))
+                self._batch.clear()
+            super().flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class _BatchingQueueListener(QueueListener):
+    """Сбрасывает пачку на диск, как только очередь опустела."""
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            for handler in self.handlers:
+                handler.flush()
+
+
+_listeners = None
+
+
+def setup_logging(async_logging=None):
+    """Подключает файлы логов к INFO_LOG и ERR_LOG.
+
+    При async_logging=True (по умолчанию - config.ASYNC_LOGGING) запись
+    в файлы идёт в отдельном потоке через очередь: вызывающий код только
+    кладёт запись в очередь, а файлы пишутся пачками. Сами файлы
+    открываются только при первой записи в лог.
+    """
+    global _listeners
+    shutdown_logging()
+
+    if async_logging is None:
+        async_logging = config.ASYNC_LOGGING
+
+    handlers = []
+    for logger, filename in ((INFO_LOG, config.GOOD_LOG_FILE), (ERR_LOG, config.ERROR_LOG_FILE)):
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+        if async_logging:
+            file_handler = BatchingFileHandler(filename, config.LOG_BATCH_SIZE)
+        else:
+            file_handler = logging.FileHandler(filename, mode='a', delay=True)
+        file_handler.setFormatter(formatter)
+
+        if async_logging:
+            log_queue = queue.SimpleQueue()
+            logger.addHandler(QueueHandler(log_queue))
+            handlers.append((log_queue, file_handler))
+        else:
+            logger.addHandler(file_handler)
+
+    if handlers:
+        _listeners = [_BatchingQueueListener(log_queue, handler) for log_queue, handler in handlers]
+        for listener in _listeners:
+            listener.start()
+
+
+def shutdown_logging():
+    """Дописывает всё, что осталось в очередях, и останавливает фоновые потоки."""
+    global _listeners
+    if _listeners:
+        for listener in _listeners:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+    _listeners = None
+
+
+atexit.register(shutdown_logging)
+setup_logging()
@@ -0,0 +1,158 @@
+import atexit
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from homework import config
+
+BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, float('inf'))
+
+_enabled = config.METRICS_ENABLED
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_caches = {}
+
+
+class Histogram:
+    """Число вызовов, суммарное время и распределение задержек по BUCKETS (секунды)."""
+
+    __slots__ = ('count', 'sum', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+
+    def snapshot(self):
+        cumulative, total = {}, 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            total += count
+            cumulative[bound] = total
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def inc(name, value=1):
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, seconds):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+
+def timed(name):
+    """Декоратор: время каждого вызова попадает в гистограмму name,
+       исключения считаются в счётчике name + '.errors'.
+
+       Пока метрики выключены, обёртка только проверяет флаг и вызывает функцию.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                inc(name + '.errors')
+                raise
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def register_cache(name, stats):
+    """stats() возвращает (попадания, промахи) кэша name на текущий момент."""
+    _caches[name] = stats
+
+
+def snapshot():
+    """Текущие значения всех метрик в виде словаря."""
+    with _lock:
+        result = {'counters': dict(_counters),
+                  'histograms': {name: histogram.snapshot() for name, histogram in _histograms.items()}}
+
+    caches = {}
+    for name, stats in _caches.items():
+        hits, misses = stats()
+        caches[name] = {'hits': hits, 'misses': misses,
+                        'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+    result['caches'] = caches
+    return result
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _bound(bound):
+    return "+Inf" if bound == float('inf') else repr(bound)
+
+
+def prometheus_text(data=None):
+    """Метрики в текстовом формате Prometheus."""
+    data = snapshot() if data is None else data
+    lines = ["# TYPE homework_call_seconds histogram"]
+    for name, histogram in sorted(data['histograms'].items()):
+        for bound, count in histogram['buckets'].items():
+            lines.append(f'homework_call_seconds_bucket{{name="{_label(name)}",le="{_bound(bound)}"}} {count}')
+        lines.append(f'homework_call_seconds_sum{{name="{_label(name)}"}} {histogram["sum"]!r}')
+        lines.append(f'homework_call_seconds_count{{name="{_label(name)}"}} {histogram["count"]}')
+
+    lines.append("# TYPE homework_events_total counter")
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f'homework_events_total{{name="{_label(name)}"}} {value}')
+
+    for kind in ('hits', 'misses'):
+        lines.append(f"# TYPE homework_cache_{kind}_total counter")
+        for name, cache in sorted(data['caches'].items()):
+            lines.append(f'homework_cache_{kind}_total{{cache="{_label(name)}"}} {cache[kind]}')
+    return '\n'.join(lines) + '\n'
+
+
+def dump_prometheus(path=None):
+    """Пишет метрики в файл (по умолчанию config.METRICS_FILE) целиком за одну замену файла."""
+    path = path or config.METRICS_FILE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _dump_at_exit():
+    if _enabled and config.METRICS_FILE:
+        dump_prometheus()
+
+
+atexit.register(_dump_at_exit)
@@ -0,0 +1,311 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from homework import config, metrics
+from homework.lazy import lazy_import
+
+requests = lazy_import("requests")
+bs4 = lazy_import("bs4")
+
+FIRST_NAME = "first_name"
+LAST_NAME = "last_name"
+
+
+class NameBackend:
+    """Источник, по которому проверяется существование имён и фамилий."""
+
+    def has_first_name(self, first_name):
+        return self.lookup(FIRST_NAME, first_name)
+
+    def has_last_name(self, last_name):
+        return self.lookup(LAST_NAME, last_name)
+
+    def lookup(self, kind, name):
+        raise NotImplementedError
+
+
+def first_name_url(first_name):
+    return config.FIRST_NAME_URL.format(first_name)
+
+
+def last_name_url(last_name):
+    return config.LAST_NAME_URL.format(last_name.lower())
+
+
+@metrics.timed("names.parse_first_name_page")
+def parse_first_name_page(content, first_name):
+    soup = bs4.BeautifulSoup(content, "html.parser")
+    return any(link.text == first_name for link in soup.find_all(name='a'))
+
+
+@metrics.timed("names.parse_last_name_page")
+def parse_last_name_page(content):
+    soup = bs4.BeautifulSoup(content, "html.parser")
+    return bool(soup.find_all(name='span', attrs={'class': 'version-number'}))
+
+
+class OnlineNameBackend(NameBackend):
+    """Проверка через imenator.ru / ufolog.ru (одна сессия на все запросы)."""
+
+    def __init__(self, session=None, timeout=None, pool_size=None):
+        if session is None:
+            pool_size = pool_size or config.NAME_LOOKUP_CONCURRENCY
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self._session = session
+        self._timeout = timeout
+
+    @metrics.timed("names.http_lookup")
+    def lookup(self, kind, name):
+        if kind == FIRST_NAME:
+            page = self._session.get(first_name_url(name), timeout=self._timeout)
+            return parse_first_name_page(page.content, name)
+        else:
+            page = self._session.get(last_name_url(name), timeout=self._timeout)
+            return parse_last_name_page(page.content)
+
+
+class OfflineNameBackend(NameBackend):
+    """Проверка по локальным спискам, которые читаются один раз при первом обращении."""
+
+    def __init__(self, first_names=None, last_names=None, *,
+                 first_names_file=None, last_names_file=None):
+        self._names = {FIRST_NAME: _as_set(first_names), LAST_NAME: _as_set(last_names)}
+        self._files = {FIRST_NAME: first_names_file or config.FIRST_NAMES_FILE,
+                       LAST_NAME: last_names_file or config.LAST_NAMES_FILE}
+        self._lock = threading.Lock()
+
+    def lookup(self, kind, name):
+        names = self._names[kind]
+        if names is None:
+            with self._lock:
+                names = self._names[kind]
+                if names is None:
+                    names = self._names[kind] = _read_names(self._files[kind])
+        return name.capitalize() in names
+
+    def __getstate__(self):
+        return _without_lock(self)
+
+    def __setstate__(self, state):
+        _with_lock(self, state)
+
+
+def _as_set(names):
+    if names is None:
+        return None
+    return frozenset(name.capitalize() for name in names)
+
+
+def _without_lock(backend):
+    """Состояние для pickle без блокировки: источник передаётся процессам from_csv."""
+    state = backend.__dict__.copy()
+    del state['_lock']
+    return state
+
+
+def _with_lock(backend, state):
+    backend.__dict__.update(state)
+    backend._lock = threading.Lock()
+
+
+def _read_names(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return frozenset(line.strip().capitalize() for line in f if line.strip())
+
+
+class CachedNameBackend(NameBackend):
+    """LRU-кэш с TTL поверх другого источника и, при желании, постоянный кэш на диске."""
+
+    def __init__(self, backend, maxsize=None, ttl=None, path=None):
+        self._backend = backend
+        self._maxsize = config.NAME_CACHE_SIZE if maxsize is None else maxsize
+        self._ttl = config.NAME_CACHE_TTL if ttl is None else ttl
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskCache(path) if path else None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, kind, name):
+        key = (kind, name)
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now - entry[1] < self._ttl:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        found = self._disk.get(kind, name, now - self._ttl) if self._disk else None
+        if found is None:
+            found = self._backend.lookup(kind, name)
+            if self._disk:
+                self._disk.put(kind, name, found, now)
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        self._remember(key, found, now)
+        return found
+
+    def peek(self, kind, name):
+        """Результат из кэша без обращения к источнику (None, если его там нет)."""
+        entry = self._cache.get((kind, name))
+        if entry is not None and time.time() - entry[1] < self._ttl:
+            return entry[0]
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _remember(self, key, found, now):
+        with self._lock:
+            self._cache[key] = (found, now)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+
+    def __getstate__(self):
+        with self._lock:
+            state = _without_lock(self)
+            state['_cache'] = self._cache.copy()
+        return state
+
+    def __setstate__(self, state):
+        _with_lock(self, state)
+
+
+class PrefetchedNameBackend(NameBackend):
+    """Ответы, уже полученные prefetch; остальное спрашивается у backend."""
+
+    def __init__(self, found, backend=None):
+        self._found = found
+        self._backend = backend
+
+    def lookup(self, kind, name):
+        found = self._found.get((kind, name))
+        if isinstance(found, bool):
+            return found
+        return (self._backend or get_backend()).lookup(kind, name)
+
+
+class _DiskCache:
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS names ("
+                         "kind TEXT, name TEXT, found INTEGER, ts REAL, "
+                         "PRIMARY KEY (kind, name))")
+
+    def __getstate__(self):
+        return {'_path': self._path}
+
+    def __setstate__(self, state):
+        self._path = state['_path']
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self._path, timeout=30)
+        return conn
+
+    def get(self, kind, name, min_ts):
+        row = self._connect().execute("SELECT found FROM names WHERE kind = ? AND name = ? AND ts >= ?",
+                                      (kind, name, min_ts)).fetchone()
+        return None if row is None else bool(row[0])
+
+    def put(self, kind, name, found, ts):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?)",
+                         (kind, name, int(found), ts))
+
+
+async def prefetch(pairs, concurrency=None, backend=None):
+    """Параллельно проверяет пары (kind, name), каждую уникальную - один раз.
+
+    Запросы идут в общий пул из config.NAME_LOOKUP_CONCURRENCY потоков.
+    Возвращает словарь {(kind, name): найдено ли} - или исключение,
+    если проверить не удалось.
+    """
+    backend = backend or get_backend()
+    concurrency = concurrency or config.NAME_LOOKUP_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    result = {}
+    unique = []
+    for pair in dict.fromkeys(pairs):
+        cached = backend.peek(*pair) if isinstance(backend, CachedNameBackend) else None
+        if cached is None:
+            unique.append(pair)
+        else:
+            result[pair] = cached
+
+    executor = _lookup_executor()
+
+    async def lookup(pair):
+        async with semaphore:
+            return await loop.run_in_executor(executor, backend.lookup, *pair)
+
+    found = await asyncio.gather(*(lookup(pair) for pair in unique), return_exceptions=True)
+
+    result.update(zip(unique, found))
+    return result
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _lookup_executor():
+    """Общий на все вызовы prefetch пул потоков (config.NAME_LOOKUP_CONCURRENCY потоков)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.NAME_LOOKUP_CONCURRENCY,
+                                           thread_name_prefix="name-lookup")
+        return _executor
+
+
+_backend = None
+
+
+def create_backend():
+    if config.NAME_BACKEND == "offline":
+        backend = OfflineNameBackend()
+    else:
+        backend = OnlineNameBackend()
+    return CachedNameBackend(backend, path=config.NAME_CACHE_PATH)
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def _cache_stats():
+    backend = _backend
+    if isinstance(backend, CachedNameBackend):
+        return backend.hits, backend.misses
+    return 0, 0
+
+
+metrics.register_cache("names", _cache_stats)
@@ -0,0 +1,212 @@
+from array import array
+from datetime import date
+
+from homework.lazy import lazy_import
+from homework.storage import ColumnarStorage, _CODES, _VALUES, _unpack_phone, _unpack_doc_id
+
+np = lazy_import("numpy")
+
+VERSION = 1
+COLUMNS = ('first_name', 'last_name', 'birth_date', 'phone', 'doc_type', 'doc_id', 'status')
+_NAME_COLUMNS = ('first_name', 'last_name')
+_TYPECODES = {'birth_date': 'i', 'phone': 'q', 'doc_type': 'B', 'doc_id': 'q', 'status': 'B'}
+_RAW_COLUMNS = ('birth_date', 'phone', 'doc_id')
+
+
+def _dtype(column):
+    return np.dtype(f"{'u' if _TYPECODES[column] == 'B' else 'i'}{array(_TYPECODES[column]).itemsize}")
+
+
+def save(storage, path):
+    """Сохраняет ColumnarStorage в .npz: по массиву на столбец.
+
+    Имена хранятся словарём (уникальные значения + коды int32), дата
+    рождения - номером дня, телефон и номер документа - числами, тип
+    документа и статус - кодами uint8. Неупакованные значения лежат
+    отдельно: номера строк, номера полей и сами строки.
+    """
+    columns, raw = storage.columns()
+    arrays = {'version': np.array(VERSION)}
+
+    for column in _NAME_COLUMNS:
+        codes = {}
+        arrays[f'{column}_codes'] = np.fromiter((codes.setdefault(name, len(codes)) for name in columns[column]),
+                                                dtype=np.int32, count=len(columns[column]))
+        arrays[f'{column}_values'] = np.array(list(codes), dtype=str)
+
+    for column in _TYPECODES:
+        arrays[column] = np.frombuffer(columns[column], dtype=_dtype(column))
+
+    raw = sorted(raw.items())
+    arrays['raw_rows'] = np.array([row for (row, field), value in raw], dtype=np.int64)
+    arrays['raw_fields'] = np.array([_RAW_COLUMNS.index(field) for (row, field), value in raw], dtype=np.uint8)
+    arrays['raw_values'] = np.array([str(value) for key, value in raw], dtype=str)
+
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def _encode(column, value):
+    if column in ('doc_type', 'status'):
+        return _CODES[value]
+    if column == 'birth_date':
+        return date.fromisoformat(value).toordinal()
+    return int(''.join(filter(str.isdigit, value)))
+
+
+def _mask(data, column, condition):
+    """Маска строк, подходящих под условие на один столбец.
+
+    condition - значение (равенство) или кортеж (от, до) включительно,
+    любая граница может быть None. Для имён сравниваются строки, для
+    даты рождения - даты в формате ГГГГ-ММ-ДД, для типа документа и
+    статуса - внутренние значения None, True, False.
+    """
+    if column in _NAME_COLUMNS:
+        values = data[f'{column}_values']
+        return _compare(values, condition)[data[f'{column}_codes']]
+
+    if column not in _TYPECODES:
+        raise ValueError(f"Unknown column: {column}")
+
+    if isinstance(condition, tuple):
+        low, high = (None if bound is None else _encode(column, bound) for bound in condition)
+        mask = _compare(data[column], (low, high))
+    else:
+        mask = data[column] == _encode(column, condition)
+
+    if column in _RAW_COLUMNS:
+        rows = data['raw_rows'][data['raw_fields'] == _RAW_COLUMNS.index(column)]
+        if len(rows):
+            mask[rows] = False
+            values = data['raw_values'][data['raw_fields'] == _RAW_COLUMNS.index(column)]
+            mask[rows[_compare(values, condition)]] = True
+    return mask
+
+
+def _compare(values, condition):
+    if not isinstance(condition, tuple):
+        return values == condition
+    low, high = condition
+    mask = np.ones(len(values), dtype=bool)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
+
+
+class _Columns:
+    """Столбцы .npz, читаемые из архива только при первом обращении."""
+
+    def __init__(self, npz):
+        self._npz = npz
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            self._loaded[name] = self._npz[name]
+        return self._loaded[name]
+
+
+def _select(data, where):
+    mask = None
+    for column, condition in (where or {}).items():
+        column_mask = _mask(data, column, condition)
+        mask = column_mask if mask is None else mask & column_mask
+    return mask
+
+
+def _decode(data, column, mask, rows):
+    if column in _NAME_COLUMNS:
+        codes = data[f'{column}_codes']
+        return data[f'{column}_values'][codes if mask is None else codes[mask]].tolist()
+
+    packed = data[column] if mask is None else data[column][mask]
+    if column in ('doc_type', 'status'):
+        return [_VALUES[code] for code in packed.tolist()]
+    if column == 'birth_date':
+        values = [date.fromordinal(ordinal).isoformat() if ordinal else None for ordinal in packed.tolist()]
+    elif column == 'phone':
+        values = [_unpack_phone(number) for number in packed.tolist()]
+    else:
+        doc_types = data['doc_type'] if mask is None else data['doc_type'][mask]
+        values = [_unpack_doc_id(_VALUES[code], number)
+                  for code, number in zip(doc_types.tolist(), packed.tolist())]
+
+    field = _RAW_COLUMNS.index(column)
+    for row, value in zip(data['raw_rows'][data['raw_fields'] == field].tolist(),
+                          data['raw_values'][data['raw_fields'] == field].tolist()):
+        if row in rows:
+            values[rows[row]] = value
+    return values
+
+
+def read_columns(path, columns=COLUMNS, where=None):
+    """Читает из .npz только нужные столбцы и только подходящие строки.
+
+    where - {столбец: условие}, см. _mask. Условия проверяются на
+    упакованных массивах до распаковки значений.
+    Возвращает {столбец: список значений}.
+    """
+    with np.load(path) as npz:
+        data = _Columns(npz)
+        mask = _select(data, where)
+        rows = _row_numbers(data, mask)
+        return {column: _decode(data, column, mask, rows) for column in columns}
+
+
+def count_by(path, column, where=None):
+    """Число записей по значениям столбца без распаковки остальных столбцов."""
+    with np.load(path) as npz:
+        data = _Columns(npz)
+        mask = _select(data, where)
+        if column in ('doc_type', 'status'):
+            packed = data[column] if mask is None else data[column][mask]
+            counts = np.bincount(packed, minlength=len(_VALUES)).tolist()
+            return {value: counts[code] for code, value in enumerate(_VALUES)}
+
+        values, counts = np.unique(_decode(data, column, mask, _row_numbers(data, mask)), return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+
+def _row_numbers(data, mask):
+    """{номер строки в файле: номер среди выбранных} для строк с неупакованными значениями."""
+    raw_rows = data['raw_rows'].tolist()
+    if mask is None:
+        return {row: row for row in raw_rows}
+    positions = np.cumsum(mask) - 1
+    return {row: int(positions[row]) for row in raw_rows if mask[row]}
+
+
+def load(path, storage, where=None):
+    """Дописывает записи из .npz в ColumnarStorage (только подходящие под where)."""
+    with np.load(path) as npz:
+        data = _Columns(npz)
+        mask = _select(data, where)
+        rows = _row_numbers(data, mask)
+
+        columns = {}
+        for column in _NAME_COLUMNS:
+            codes = data[f'{column}_codes']
+            columns[column] = data[f'{column}_values'][codes if mask is None else codes[mask]].tolist()
+        for column in _TYPECODES:
+            packed = data[column] if mask is None else data[column][mask]
+            columns[column] = packed.astype(_dtype(column), copy=False).tobytes()
+
+        raw = []
+        for row, field, value in zip(data['raw_rows'].tolist(), data['raw_fields'].tolist(),
+                                     data['raw_values'].tolist()):
+            if row in rows:
+                raw.append(((rows[row], _RAW_COLUMNS[field]), value))
+
+        storage.extend_columns(columns, raw)
+    return storage
+
+
+def to_storage(patients, patient_cls):
+    """ColumnarStorage с копиями пациентов (для сохранения любой коллекции)."""
+    storage = ColumnarStorage(patient_cls)
+    for patient in patients:
+        storage.append(patient)
+    return storage
@@ -0,0 +1,182 @@
+import os
+import struct
+import zlib
+from array import array
+
+_MAGIC = b"PIDX2\n"
+_HEADER = struct.Struct("<6sqqqII")
+_FINGERPRINT_SIZE = 4096
+_CHUNK_SIZE = 1 << 20
+
+
+class OffsetIndex:
+    """Индекс смещений строк .csv, хранящийся рядом с файлом (DB.csv.idx).
+
+    Позволяет перейти к строке с любым номером без чтения файла с начала.
+    Индекс строится при первом обращении, при дописывании в файл
+    дополняется только новыми строками, а если файл был изменён иначе
+    (укорочен или перезаписан), строится заново.
+
+    Записи считаются так же, как в reader.iter_rows: пустые строки
+    пропускаются, последняя строка без перевода строки - тоже запись.
+    """
+
+    def __init__(self, csv_path, index_path=None):
+        self._csv_path = csv_path
+        self._index_path = index_path or csv_path + ".idx"
+        self._offsets = array('q')
+        self._end = 0
+        self._mtime_ns = -1
+        self._size = -1
+        self._head_crc = 0
+        self._tail_crc = 0
+        self._ino = None
+        self._loaded = False
+
+    def __len__(self):
+        self.refresh()
+        return len(self._offsets)
+
+    def offset(self, row):
+        self.refresh()
+        return self._offsets[row]
+
+    def span(self, row):
+        self.refresh()
+        start = self._offsets[row]
+        end = self._offsets[row + 1] if row + 1 < len(self._offsets) else max(self._end, self._size)
+        return start, end
+
+    def read_line(self, row):
+        start, end = self.span(row)
+        with open(self._csv_path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def read_lines(self, start, stop=None):
+        """Строки с номерами [start, stop) - без чтения файла до start."""
+        self.refresh()
+        stop = len(self._offsets) if stop is None else min(stop, len(self._offsets))
+        if start >= stop:
+            return
+
+        with open(self._csv_path, 'rb') as f:
+            f.seek(self._offsets[start])
+            count = stop - start
+            while count:
+                line = f.readline()
+                if not line:
+                    return
+                if line.rstrip(b'\r\n'):
+                    count -= 1
+                    yield line
+
+    def refresh(self):
+        """Проверяет, что индекс соответствует файлу, и при необходимости обновляет его."""
+        try:
+            stat = os.stat(self._csv_path)
+        except FileNotFoundError:
+            self._reset()
+            return
+
+        if stat.st_size == self._size and stat.st_mtime_ns == self._mtime_ns:
+            return
+
+        if not self._loaded:
+            self._loaded = True
+            self._load()
+            if stat.st_size == self._size and stat.st_mtime_ns == self._mtime_ns:
+                return
+
+        if self._ino is not None and stat.st_ino != self._ino:
+            self._reset()  # файл подменён целиком (os.replace), а не дописан
+
+        with open(self._csv_path, 'rb') as f:
+            if not (stat.st_size >= self._end and self._fingerprint(f, self._end) == (self._head_crc, self._tail_crc)):
+                self._reset()
+            self._scan(f)
+            self._head_crc, self._tail_crc = self._fingerprint(f, self._end)
+
+        self._size = stat.st_size
+        self._mtime_ns = stat.st_mtime_ns
+        self._ino = stat.st_ino
+        self._dump()
+
+    def _reset(self):
+        self._offsets = array('q')
+        self._end = 0
+        self._size = -1
+        self._mtime_ns = -1
+        self._head_crc = self._tail_crc = 0
+
+    def _scan(self, f):
+        """Дочитывает файл с конца последней известной строки.
+
+        Строка без перевода строки в конце файла попадает в индекс, но _end
+        остаётся перед ней: при следующем обновлении она читается заново
+        (вдруг её дописали).
+        """
+        offsets = self._offsets
+        if offsets and offsets[-1] >= self._end:
+            offsets.pop()
+        pos = self._end
+        header = pos == 0
+        f.seek(pos)
+        pending = b""
+
+        while True:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = pending + chunk
+            base = pos - len(pending)
+            start = 0
+            while True:
+                end = data.find(b"\n", start)
+                if end == -1:
+                    break
+                if header:
+                    header = False
+                elif end - start > 2 or data[start:end].rstrip(b'\r'):
+                    offsets.append(base + start)
+                start = end + 1
+            pending = data[start:]
+            pos += len(chunk)
+
+        self._end = pos - len(pending)
+        if not header and pending.rstrip(b'\r'):
+            offsets.append(self._end)
+
+    @staticmethod
+    def _fingerprint(f, end):
+        f.seek(0)
+        head = f.read(min(end, _FINGERPRINT_SIZE))
+        f.seek(max(0, end - _FINGERPRINT_SIZE))
+        tail = f.read(min(end, _FINGERPRINT_SIZE))
+        return zlib.crc32(head), zlib.crc32(tail)
+
+    def _load(self):
+        try:
+            with open(self._index_path, 'rb') as f:
+                magic, end, size, mtime_ns, head_crc, tail_crc = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return
+                offsets = array('q')
+                offsets.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            return
+
+        self._offsets = offsets
+        self._end, self._size, self._mtime_ns = end, size, mtime_ns
+        self._head_crc, self._tail_crc = head_crc, tail_crc
+
+    def _dump(self):
+        tmp_path = self._index_path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, self._end, self._size, self._mtime_ns,
+                                     self._head_crc, self._tail_crc))
+                self._offsets.tofile(f)
+            os.replace(tmp_path, self._index_path)
+        except OSError:
+            pass
@@ -1,10 +1,29 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+import asyncio
 import csv
 import os
+from concurrent.futures import ProcessPoolExecutor
 
+import homework.chart as chart
 import homework.check as check
+import homework.dedup as dedup
+import homework.export as export
+import homework.loader as loader
+import homework.metrics as metrics
+import homework.names as names
+import homework.npz as npz
 from homework.loggers import INFO_LOG, ERR_LOG
+from homework.indexes import PatientIndexes
+from homework.journal import Journal
+from homework.lazy import lazy_import
+from homework.offsets import OffsetIndex
+from homework.query import Query
+from homework.stats import PatientStats
+from homework.reader import iter_rows
+from homework.storage import STORAGES, ColumnarStorage
+import homework.writer as writer
+from homework.writer import PatientWriter, FIELDNAMES
+
+pd = lazy_import("pandas")
 
 _BY_PANDAS = False
 
@@ -16,6 +35,11 @@ class Patient:
     _STATUSES = {None: "Болен",
                  True: "Выздоровел",
                  False: "Умер"}
+    _INVERTED_DOCUMENT_TYPES = {value: key for key, value in _DOCUMENT_TYPES.items()}
+    _INVERTED_STATUSES = {value: key for key, value in _STATUSES.items()}
+
+    __slots__ = ('_first_name', '_last_name', '_birth_date', '_phone',
+                 '_document', '_status', '_owner', '_row')
 
     def __init__(self, first_name, last_name, birth_date, phone,
                  doc_type, doc_id, status=None, *, _with_check=True):
@@ -29,16 +53,41 @@ class Patient:
             self._phone = attrs['phone']
             self._document = (attrs['doc_type'], attrs['doc_id'])
         else:
-            inverted_dict = {value: key for key, value in Patient._DOCUMENT_TYPES.items()}
-
             self._first_name = first_name
             self._last_name = last_name
             self._birth_date = birth_date
             self._phone = phone
-            self._document = (inverted_dict[doc_type], doc_id)
+            self._document = (Patient._INVERTED_DOCUMENT_TYPES[doc_type], doc_id)
 
         self._status = status
-        INFO_LOG.info(f"Был создан пациент {self}")
+        self._owner = None
+        self._row = None
+        INFO_LOG.info("Был создан пациент %s", self)
+
+    @classmethod
+    def _from_trusted_row(cls, first_name, last_name, birth_date, phone,
+                          doc_type, doc_id, status=None):
+        """Быстрое создание пациента из уже проверенных данных (например, из БД).
+           doc_type и status передаются во внутреннем виде: None, True или False.
+        """
+        patient = cls.__new__(cls)
+        patient._first_name = first_name
+        patient._last_name = last_name
+        patient._birth_date = birth_date
+        patient._phone = phone
+        patient._document = (doc_type, doc_id)
+        patient._status = status
+        patient._owner = None
+        patient._row = None
+        INFO_LOG.debug("Загружен пациент %s", patient)
+        return patient
+
+    @classmethod
+    def _from_csv_line(cls, line):
+        params = line.rstrip().split(',')
+        return cls._from_trusted_row(params[0], params[1], params[2], params[3],
+                                     cls._INVERTED_DOCUMENT_TYPES[params[4]], params[5],
+                                     cls._INVERTED_STATUSES[params[6]])
 
     @staticmethod
     def create(first_name, last_name, birth_date,
@@ -88,28 +137,33 @@ class Patient:
         return self._document[1]
 
     @first_name.setter
+    @metrics.timed("patient.set_first_name")
     def first_name(self, new_first_name):
         new_first_name = check.check_first_name(new_first_name)
 
         if check.is_typo_in_name(self._first_name, new_first_name):
-            INFO_LOG.info(f"Изменено имя на '{new_first_name}' у пациента {self}.")
+            INFO_LOG.info("Изменено имя на '%s' у пациента %s.", new_first_name, self)
             self._first_name = new_first_name
+            self._changed('first_name')
         else:
             ERR_LOG.error("Не распознана опечатка в first_name.")
             raise AttributeError("A typo is not found")
 
     @last_name.setter
+    @metrics.timed("patient.set_last_name")
     def last_name(self, new_last_name):
         new_last_name = check.check_last_name(new_last_name)
 
         if check.is_typo_in_name(self._last_name, new_last_name):
-            INFO_LOG.info(f"Изменена фамилия на '{new_last_name}' у пациента {self}.")
+            INFO_LOG.info("Изменена фамилия на '%s' у пациента %s.", new_last_name, self)
             self._last_name = new_last_name
+            self._changed('last_name')
         else:
             ERR_LOG.error("Не распознана опечатка в last_name.")
             raise AttributeError("A typo is not found")
 
     @birth_date.setter
+    @metrics.timed("patient.set_birth_date")
     def birth_date(self, new_date):
         new_date = check.check_birth_date(new_date)
 
@@ -121,39 +175,47 @@ class Patient:
         #     ERR_LOG.error("Не распознана опечатка в date_of_birth.")
         #     raise AttributeError("A typo is not found")
 
-        INFO_LOG.info(f"Изменена дата рождения на '{new_date}' у пациента {self}.")
+        INFO_LOG.info("Изменена дата рождения на '%s' у пациента %s.", new_date, self)
         self._birth_date = new_date
+        self._changed('birth_date')
 
     @phone.setter
+    @metrics.timed("patient.set_phone")
     def phone(self, new_phone):
         new_phone = check.check_phone(new_phone)
 
-        INFO_LOG.info(f"Изменён номер телефона на '{new_phone}' у пациента {self}.")
+        INFO_LOG.info("Изменён номер телефона на '%s' у пациента %s.", new_phone, self)
         self._phone = new_phone
+        self._changed('phone')
 
     @document_type.setter
+    @metrics.timed("patient.set_document_type")
     def document_type(self, new_doc_type):
         new_doc_type = check.check_doc_type(new_doc_type)
 
         if new_doc_type is self._document[0]:
-            INFO_LOG.info(f"Тип документа не изменился у пациента {self}.")
+            INFO_LOG.info("Тип документа не изменился у пациента %s.", self)
         elif new_doc_type is not self._document[0]:
-            INFO_LOG.info(f"Изменён тип документа у пациента {self}.")
+            INFO_LOG.info("Изменён тип документа у пациента %s.", self)
             self._document = (new_doc_type, NotImplemented)
+            self._changed('document_type', 'document_id')
         else:
-            ERR_LOG.error(f"В типе документа оказалось '{new_doc_type}'")
+            ERR_LOG.error("В типе документа оказалось '%s'", new_doc_type)
             raise ValueError("A mistake was made in document type")
 
     @document_id.setter
+    @metrics.timed("patient.set_document_id")
     def document_id(self, new_id):
         new_id = check.check_doc_id(self._document[0], new_id)
 
         if self._document[1] is NotImplemented:
-            INFO_LOG.info(f"Был заполнен номер документа: '{new_id}' у пациента {self}.")
+            INFO_LOG.info("Был заполнен номер документа: '%s' у пациента %s.", new_id, self)
             self._document = (self._document[0], new_id)
+            self._changed('document_id')
         elif check.is_typo_in_doc_id(self._document[1], new_id):
-            INFO_LOG.info(f"Изменёна опечатка в номере документа на '{new_id}' у пациента {self}.")
+            INFO_LOG.info("Изменёна опечатка в номере документа на '%s' у пациента %s.", new_id, self)
             self._document = (self._document[0], new_id)
+            self._changed('document_id')
         else:
             ERR_LOG.error("Не распознана опечатка в document id.")
             raise AttributeError("A typo is not found")
@@ -169,58 +231,189 @@ class Patient:
         else:
             raise ValueError
 
+    @metrics.timed("patient.save")
     def save(self, filename='DB.csv', *, _by_pandas=_BY_PANDAS):
+        """Дописывает пациента в файл. Одновременные вызовы из нескольких потоков
+           записываются общей пачкой, из нескольких процессов - по очереди под
+           блокировкой файла (см. homework.writer).
+        """
         if _by_pandas:
-            self._save_by_standard(filename)
-        else:
             self._save_by_pandas(filename)
+        else:
+            writer.commit(filename, [self._to_csv_line()])
+            INFO_LOG.info("Пациент записан в файл '%s': %s", filename, self)
+
+    def _to_csv_line(self):
+        return f"{self._first_name},{self._last_name},{self._birth_date},{self._phone}," \
+               f"{Patient._DOCUMENT_TYPES[self._document[0]]},{self._document[1]}," \
+               f"{Patient._STATUSES[self._status]}\n"
 
     def _save_by_standard(self, filename='DB.csv'):
-        with open(filename, 'a', encoding='utf-8') as f:
-            if os.stat(filename).st_size == 0:
-                fieldnames = ('First name', 'Last name', 'Date of Birth',
-                              'Phone number', 'Doc type', 'Doc number', 'Status')
-                writer = csv.DictWriter(f, fieldnames)
-                writer.writeheader()
+        with writer.locked_open(filename, 'a', encoding='utf-8') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                csv.DictWriter(f, FIELDNAMES).writeheader()
 
-            f.write(f"{self.first_name},{self.last_name},{self.birth_date},{self.phone},"
-                    f"{self.document_type},{self.document_id},{Patient._STATUSES[self._status]}\n")
+            f.write(self._to_csv_line())
 
         INFO_LOG.info("Пациент был успешно записан в файл!")
 
     def _save_by_pandas(self, filename='DB.csv'):
-        if os.stat(filename).st_size == 0:
-            df = pd.DataFrame(columns=('First name', 'Last name', 'Date of Birth',
-                                       'Phone number', 'Doc type', 'Doc number', 'Status'))
-        else:
-            df = pd.read_csv(filename, sep=',')
+        # Файл перечитывается и перезаписывается целиком, поэтому блокировка
+        # держится всё это время.
+        with writer.locked_open(filename, 'a', encoding='utf-8') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                df = pd.DataFrame(columns=FIELDNAMES)
+            else:
+                df = pd.read_csv(filename, sep=',')
 
-        df.loc[df.size] = (self.first_name, self.last_name, self.birth_date, self.phone,
-                           self.document_type, self.document_id, Patient._STATUSES[self._status])
+            df.loc[df.size] = (self.first_name, self.last_name, self.birth_date, self.phone,
+                               self.document_type, self.document_id, Patient._STATUSES[self._status])
 
-        df.to_csv(filename, index=False, encoding='utf-8')
+            df.to_csv(filename, index=False, encoding='utf-8')
 
     def recovered(self):
         self._status = True
-        INFO_LOG.info(f"Выздоровел: {self}")
+        self._changed('status')
+        INFO_LOG.info("Выздоровел: %s", self)
 
     def dead(self):
         self._status = False
-        INFO_LOG.info(f"Умер: {self}")
+        self._changed('status')
+        INFO_LOG.info("Умер: %s", self)
+
+    def _changed(self, *fields):
+        if self._owner is not None:
+            self._owner._patient_changed(self._row, self, fields)
 
 
 class PatientCollection:
-    def __init__(self, filename=None, *, by_pandas=_BY_PANDAS):
-        self._patients = []
+    def __init__(self, filename=None, *, by_pandas=_BY_PANDAS, storage="list", workers=1):
+        """storage="columnar" хранит пациентов компактно по столбцам,
+           объекты Patient создаются только при обращении к ним.
+           storage="file" не загружает файл: записи читаются по индексу смещений.
+           storage="sqlite" хранит пациентов в базе SQLite (filename - путь к базе),
+           изменения пациентов сразу записываются в базу.
+
+           workers - во сколько процессов разбирать .csv (None - по числу ядер):
+           файл делится на куски по границам строк (см. homework.loader).
+           Только для storage="columnar": столбцы из процессов собираются
+           без создания Patient, а список пациентов пришлось бы строить
+           из них заново в одном процессе.
+
+           Изменения пациентов, уже записанных в .csv, дописываются в журнал
+           рядом с ним (см. homework.journal) и накладываются при загрузке.
+        """
+        if filename:
+            self._storage = STORAGES[storage](Patient, self, filename)
+        else:
+            self._storage = STORAGES[storage](Patient, self)
+        self._offsets = None
+        self._indexes = None
+        self._stats = None
+        self._journal = None
+        self._file_rows = None
+        self._file_records = 0
 
         if filename:
-            if by_pandas:
-                self._create_from_csv_by_pandas(filename)
+            if self._storage.persistent:
+                self._journal = getattr(self._storage, 'journal', None)
+            elif by_pandas:
+                self._journal = Journal(filename)
+                self._create_from_csv_by_pandas(filename, self._journal)
+            elif workers != 1:
+                if not isinstance(self._storage, ColumnarStorage):
+                    raise ValueError("Parallel loading requires storage='columnar'")
+                self._journal = Journal(filename)
+                self._create_from_csv_parallel(filename, self._journal, workers)
             else:
-                self._create_from_csv(filename)
+                self._journal = Journal(filename)
+                self._create_from_csv(filename, self._journal)
             self._filename = filename
         else:
             self._filename = 'DB.csv'
+        self._saved = 0 if self._storage.persistent else len(self._storage)
+
+    @classmethod
+    @metrics.timed("collection.from_csv")
+    def from_csv(cls, path_to_file, validate=True, workers=None, *, chunk_size=10_000, storage="list"):
+        """Загружает коллекцию из .csv, при validate=True - с полной проверкой
+           каждой записи в нескольких процессах.
+           При validate=False файл разбирается в одном процессе, если
+           workers не задано явно (см. workers в __init__).
+
+           Возвращает (коллекция, [(номер строки, ошибка), ...]).
+        """
+        if not validate:
+            return cls(path_to_file, storage=storage, workers=1 if workers is None else workers), []
+        if STORAGES[storage].persistent:
+            raise ValueError("Validated patients can not be kept in a file storage")
+
+        # Записи нумеруются так же, как при обычной загрузке и в журнале: пустые строки пропускаются.
+        rows = [row.fields() for row in iter_rows(path_to_file)]
+
+        journal = Journal(path_to_file)
+        if journal.changes:
+            rows = [journal.patch(row, fields) for row, fields in enumerate(rows)]
+
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        if workers == 1 or len(chunks) <= 1:
+            results = map(_validate_rows, chunks)
+        else:
+            # Источник имён передаётся явно: без fork процессы его не унаследуют.
+            with ProcessPoolExecutor(max_workers=workers, initializer=names.set_backend,
+                                     initargs=(names.get_backend(),)) as executor:
+                results = list(executor.map(_validate_rows, chunks))
+
+        collection = cls(storage=storage)
+        collection._filename = path_to_file
+        collection._journal = journal
+        errors = []
+        file_rows = []
+
+        for line_num, (attrs, status) in enumerate((res for chunk in results for res in chunk), start=2):
+            if isinstance(attrs, Exception):
+                errors.append((line_num, attrs))
+                continue
+
+            file_rows.append(line_num - 2)
+            collection._storage.append_fields(attrs['first_name'], attrs['last_name'], attrs['birth_date'],
+                                              attrs['phone'], attrs['doc_type'], attrs['doc_id'], status)
+
+        collection._saved = len(collection)
+        if errors:
+            # Записи с ошибками пропущены: номера в коллекции и в файле (и в журнале) расходятся.
+            collection._file_rows = file_rows
+            collection._file_records = len(rows)
+        return collection, errors
+
+    @classmethod
+    @metrics.timed("collection.from_npz")
+    def from_npz(cls, path, *, where=None, storage="columnar"):
+        """Загружает коллекцию из .npz (см. homework.npz).
+
+           where - условия на столбцы, например {'status': None} или
+           {'birth_date': ('1970-01-01', '1979-12-31')}: они проверяются
+           до распаковки записей, так что лишние записи не загружаются.
+        """
+        if STORAGES[storage].persistent:
+            raise ValueError("Patients from .npz can not be kept in a file storage")
+
+        collection = cls(storage=storage)
+        if isinstance(collection._storage, ColumnarStorage):
+            npz.load(path, collection._storage, where)
+        else:
+            columns = npz.load(path, ColumnarStorage(Patient), where)
+            for row in range(len(columns)):
+                collection._storage.append_fields(*columns.fields(row))
+        return collection
+
+    @metrics.timed("collection.save_npz")
+    def save_npz(self, path):
+        """Сохраняет всю коллекцию в .npz (файл перезаписывается)."""
+        storage = self._storage
+        if not isinstance(storage, ColumnarStorage):
+            storage = npz.to_storage(storage, Patient)
+        npz.save(storage, path)
 
     def add(self, first_name, last_name, date_of_birth,
             phone_number, doc_type, doc_number):
@@ -228,88 +421,327 @@ class PatientCollection:
         new_patient = Patient(first_name, last_name, date_of_birth,
                               phone_number, doc_type, doc_number)
 
-        self._patients.append(new_patient)
-        INFO_LOG.info(f"Добавлен новый пациент: {new_patient}")
+        self._storage.append(new_patient)
+        INFO_LOG.info("Добавлен новый пациент: %s", new_patient)
+
+    async def add_many_async(self, records, *, concurrency=None):
+        results = await check.global_check_many(records, concurrency=concurrency)
+
+        for i, attrs in enumerate(results):
+            if isinstance(attrs, Exception):
+                continue
+
+            new_patient = Patient._from_trusted_row(attrs['first_name'], attrs['last_name'],
+                                                    attrs['birth_date'], attrs['phone'],
+                                                    attrs['doc_type'], attrs['doc_id'])
+            self._storage.append(new_patient)
+            INFO_LOG.info("Добавлен новый пациент: %s", new_patient)
+            results[i] = self._storage[-1]
+
+        return results
+
+    def add_many(self, records, *, concurrency=None):
+        """Добавляет пачку записей, проверяя имена параллельно.
+
+        Возвращает список той же длины: добавленный Patient
+        или исключение, из-за которого запись не была добавлена.
+        """
+        return asyncio.run(self.add_many_async(records, concurrency=concurrency))
+
+    def add_from_csv(self, path_to_file):
+        """Дописывает записи из .csv (с изменениями из его журнала) без проверки.
+
+        Возвращает число добавленных записей.
+        """
+        start = len(self._storage)
+        self._create_from_csv(path_to_file)
+        return len(self._storage) - start
 
     def __iter__(self):
-        for one_patient in self._patients:
+        for one_patient in self._storage:
             yield one_patient
 
-    def limit(self, last: int):
-        inv_sts = {value: key for key, value in Patient._STATUSES.items()}
+    def __getitem__(self, index):
+        return self._storage[index]
+
+    def _patient_changed(self, row, patient, fields):
+        self._storage.update(row, patient)
+        if self._journal is not None and (self._storage.persistent or row < self._saved):
+            self._journal.record(row if self._file_rows is None else self._file_rows[row], patient, fields)
+        if self._indexes is not None:
+            self._indexes.update(row, patient)
+        if self._stats is not None:
+            self._stats.update(row, patient)
+
+    def _synced(self, tracker):
+        """Индексы и счётчики строятся при первом обращении, а затем
+           дополняются новыми записями и обновляются при изменении пациентов.
+        """
+        patients = self._patients_from(len(tracker))
+        if hasattr(tracker, 'add_many'):
+            tracker.add_many(patients)
+        else:
+            for row, patient in patients:
+                tracker.add(row, patient)
+        return tracker
+
+    def _patients_from(self, start):
+        """(номер, пациент) начиная с записи start. Хранилище читается подряд только
+           с начала: пропускать первые записи итерацией значило бы создавать их все.
+        """
+        if start == 0:
+            return enumerate(self._storage)
+        return ((row, self._storage[row]) for row in range(start, len(self._storage)))
+
+    def _index(self):
+        if self._indexes is None:
+            self._indexes = getattr(self._storage, 'indexes', None)
+            if self._indexes is None:
+                self._indexes = PatientIndexes()
+        return self._synced(self._indexes)
+
+    def stats(self):
+        """Число пациентов по статусам, десятилетиям рождения и типам документов."""
+        if self._stats is None:
+            self._stats = PatientStats()
+        stats = self._synced(self._stats)
+
+        return {'total': len(stats),
+                'statuses': {Patient._STATUSES[key]: value for key, value in stats.statuses().items()},
+                'birth_decades': stats.birth_decades(),
+                'document_types': {Patient._DOCUMENT_TYPES[key]: value
+                                   for key, value in stats.document_types().items()}}
+
+    def find_by_phone(self, phone):
+        return [self._storage[row] for row in self._index().find_by_phone(phone)]
+
+    def find_by_document(self, doc_type, doc_id):
+        """doc_type - тип документа, как в Patient.document_type."""
+        doc_type = Patient._INVERTED_DOCUMENT_TYPES.get(doc_type, doc_type)
+        return [self._storage[row] for row in self._index().find_by_document(doc_type, doc_id)]
+
+    def find_by_last_name(self, last_name, *, prefix=False):
+        return [self._storage[row] for row in self._index().find_by_last_name(last_name, prefix)]
+
+    def find_duplicates(self, *, max_block=1000):
+        """Группы пациентов, похожих на одного и того же человека (см. homework.dedup)."""
+        records = [(patient._first_name, patient._last_name, patient._birth_date,
+                    patient._phone, *patient._document) for patient in self._storage]
+        return [[self._storage[row] for row in rows] for rows in dedup.find_duplicates(records, max_block)]
+
+    def limit(self, last: int, offset=0):
+        if hasattr(self._storage, 'select'):
+            yield from self._storage.select(offset, offset + last)
+            return
 
         with open(self._filename, 'rb') as f:
+            if offset:
+                index = self._offset_index()
+                if offset >= len(index):
+                    return
+                f.seek(index.offset(offset))
+            else:
+                f.readline()
+
             for i, line in enumerate(f):
-                if i != 0:
-                    if i <= last:
-                        params = line.decode().split(',')
-                        params[6] = inv_sts[params[6].rstrip()]
+                if i < last:
+                    next_patient = Patient._from_csv_line(self._patch_line(offset + i, line).decode())
+                    yield next_patient
+                else:
+                    break
+
+    def query(self):
+        """Ленивый запрос к записям коллекции, см. homework.query.Query:
+           collection.query().where(status="Болен").born_between("1970-01-01", None).limit(10)
+
+           Как и limit, читает файл коллекции, а не пациентов в памяти.
+        """
+        return Query(Patient, self._lines)
 
-                        next_patient = Patient(*params)
-                        yield next_patient
-                    else:
-                        break
+    def _lines(self):
+        """Строки записей (bytes без перевода строки): из файла коллекции с наложенным
+           журналом изменений или, для SQLite, из базы.
+        """
+        if hasattr(self._storage, 'select'):
+            return (patient._to_csv_line().rstrip('\n').encode('utf-8') for patient in self._storage)
+        lines = (row.line() for row in iter_rows(self._filename))
+        if self._journal is not None and self._journal.changes:
+            return (self._journal.patch_line(row, line) for row, line in enumerate(lines))
+        return lines
+
+    def _patch_line(self, row, line):
+        if self._journal is None:
+            return line
+        return self._journal.patch_line(row, line)
+
+    def compact(self, *, background=False):
+        """Переносит журнал изменений в файл коллекции (см. homework.journal.Journal.compact).
+
+           background=True - в фоновом потоке, метод сразу возвращает этот поток.
+        """
+        if self._journal is None:
+            return None
+        if background:
+            return self._journal.compact_in_background()
+        return self._journal.compact()
+
+    def export_sorted(self, key, path, *, reverse=False, memory_budget=None):
+        """Записывает пациентов в path по порядку поля key (или кортежа полей),
+           не загружая их в память: см. homework.export.sort_lines.
+        """
+        return export.sort_lines(self._lines(), export.sort_key(key), path,
+                                 reverse=reverse, memory_budget=memory_budget)
+
+    def partition_by(self, field, directory=None):
+        """Раскладывает пациентов по файлам по значению поля ('status', 'birth_year', ...)
+           за один проход. Файлы называются как файл коллекции с суффиксом: DB_Болен.csv.
+           Одновременно открыто не больше config.PARTITION_OPEN_FILES файлов.
+        """
+        directory = directory or os.path.dirname(os.path.abspath(self._filename))
+        stem = os.path.splitext(os.path.basename(self._filename))[0]
+        return export.partition_lines(self._lines(), field, directory, stem)
+
+    def slice(self, start, stop=None):
+        if hasattr(self._storage, 'select'):
+            yield from self._storage.select(start, stop)
+            return
+
+        for row, line in enumerate(self._offset_index().read_lines(start, stop), start=start):
+            yield Patient._from_csv_line(self._patch_line(row, line).decode())
+
+    def _offset_index(self):
+        if self._offsets is None:
+            self._offsets = getattr(self._storage, 'index', None) or OffsetIndex(self._filename)
+        return self._offsets
 
     def __len__(self):
-        return len(self._patients)
+        return len(self._storage)
+
+    @metrics.timed("collection.save_all")
+    def save_all(self, filename=None, *, batch_size=1000):
+        """Дописывает пациентов в .csv за один проход.
 
-    def _create_from_csv(self, path_to_file):
-        with open(path_to_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter=',')
+           В файл коллекции пишутся только ещё не сохранённые пациенты,
+           в любой другой файл - все.
+        """
+        if filename is None or filename == self._filename:
+            if self._storage.persistent:
+                return
+            filename, start = self._filename, self._saved
+        else:
+            start = 0
 
-            inv_sts = {value: key for key, value in Patient._STATUSES.items()}
+        with PatientWriter(filename, batch_size) as patient_writer:
+            patient_writer.write_many(patient for row, patient in self._patients_from(start))
 
-            for line in reader:
-                new_patient = Patient(line["First name"], line["Last name"],
-                                      line["Date of Birth"], line["Phone number"],
-                                      line["Doc type"], line["Doc number"],
-                                      inv_sts[line["Status"]], _with_check=False)
-                self._patients.append(new_patient)
+        if filename == self._filename:
+            if self._file_rows is not None:
+                added = len(self._storage) - start
+                self._file_rows.extend(range(self._file_records, self._file_records + added))
+                self._file_records += added
+            self._saved = len(self._storage)
 
-    def _create_from_csv_by_pandas(self, path_to_file):
+    def close(self):
+        """Дожидается фонового сворачивания журнала и закрывает хранилище
+           (у storage="sqlite" записываются накопленные новые записи).
+        """
+        if self._journal is not None:
+            self._journal.wait()
+        close = getattr(self._storage, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @metrics.timed("collection.load")
+    def _create_from_csv(self, path_to_file, journal=None):
+        """journal - журнал изменений файла (по умолчанию читается тот, что рядом с ним)."""
+        journal = journal or Journal(path_to_file)
+        inv_sts = Patient._INVERTED_STATUSES
+        inv_docs = Patient._INVERTED_DOCUMENT_TYPES
+        append_fields = self._storage.append_fields
+        changes = journal.changes
+
+        for row, line in enumerate(iter_rows(path_to_file)):
+            fields = line.fields()
+            if changes and row in changes:
+                fields = journal.patch(row, fields)
+            first_name, last_name, birth_date, phone, doc_type, doc_id, status = fields
+            append_fields(first_name, last_name, birth_date, phone,
+                          inv_docs[doc_type], doc_id, inv_sts[status])
+
+    @metrics.timed("collection.load_parallel")
+    def _create_from_csv_parallel(self, path_to_file, journal, workers=None):
+        """Записи разбираются по столбцам в нескольких процессах и собираются
+           в ColumnarStorage, журнал изменений накладывается уже на неё.
+        """
+        columns = self._storage
+        loader.load_columns(path_to_file, columns, Patient._INVERTED_DOCUMENT_TYPES,
+                            Patient._INVERTED_STATUSES, workers)
+
+        for row in journal.changes:
+            if row < len(columns):
+                fields = journal.patch(row, columns[row]._to_csv_line().rstrip('\n').split(','))
+                columns.update(row, Patient._from_csv_line(','.join(fields)))
+
+    @metrics.timed("collection.load_by_pandas")
+    def _create_from_csv_by_pandas(self, path_to_file, journal=None):
+        journal = journal or Journal(path_to_file)
         df = pd.read_csv(path_to_file, delimiter=',', encoding='utf-8', header=0)
-        inv_sts = {value: key for key, value in Patient._STATUSES.items()}
-
-        for column in df.values:
-            new_patient = Patient(column[0], column[1], column[2], column[3],
-                                  column[4], column[5], inv_sts[column[6]], _with_check=False)
-            self._patients.append(new_patient)
-
-    def get_statistical_chart(self):
-        num_of_infected = 0
-        num_of_recoveries = 0
-        num_of_deaths = 0
-
-        for patient in self:
-            if patient._status is None:
-                num_of_infected += 1
-            elif patient._status is True:
-                num_of_recoveries += 1
-            elif patient._status is False:
-                num_of_deaths += 1
-            else:
-                ERR_LOG.error(f"Неверный статус: {patient}")
-                raise ValueError(f"Invalid Patient._status: {patient}")
-
-        values = [num_of_infected, num_of_recoveries, num_of_deaths]
-        in_total = num_of_infected + num_of_recoveries + num_of_deaths
-        values = [val / in_total * 100 for val in values]
+        inv_sts = Patient._INVERTED_STATUSES
+        inv_docs = Patient._INVERTED_DOCUMENT_TYPES
+        changes = journal.changes
+
+        # По столбцам, а не через df.values: не строится двумерный массив объектов.
+        for row, column in enumerate(zip(*(df[name].tolist() for name in df.columns))):
+            if changes and row in changes:
+                column = journal.patch(row, column)
+            self._storage.append_fields(column[0], column[1], column[2], column[3],
+                                        inv_docs[column[4]], column[5], inv_sts[column[6]])
+
+    def get_statistical_chart(self, path="result/chart_covid_19", fmt='png', executor=None):
+        """Диаграмма по статусам пациентов.
+
+        path=None - вернуть содержимое (bytes) вместо записи в файл.
+        С executor отрисовка уходит в него, а метод сразу возвращает Future.
+        """
+        try:
+            statuses = self.stats()['statuses']
+        except ValueError as error:
+            ERR_LOG.error("Неверный статус: %s", error)
+            raise
+
+        values = (statuses[Patient._STATUSES[None]],
+                  statuses[Patient._STATUSES[True]],
+                  statuses[Patient._STATUSES[False]])
+
+        if path is None:
+            job = (chart.RENDERER.render, values, fmt)
+        else:
+            job = (chart.RENDERER.save, values, path, fmt)
 
-        labels = ["Заражено", "Выздоровело", "Умерло"]
-        explode = (0, 0, 0.07)
-        fig, ax = plt.subplots()
+        if executor is not None:
+            return executor.submit(*job)
+        return job[0](*job[1:])
 
-        ax.pie(values, labels=labels, autopct='%1.1f%%', shadow=True, explode=explode,
-               wedgeprops={'lw': 1, 'ls': '--', 'edgecolor': 'k'}, labeldistance=None,
-               colors=['darkred', 'forestgreen', 'dimgrey'])
 
-        ax.set_facecolor('oldlace')
-        fig.set_figwidth(7.5)
-        fig.set_figheight(6)
-        fig.set_facecolor('blanchedalmond')
+def _validate_rows(rows):
+    inv_sts = Patient._INVERTED_STATUSES
+    results = []
 
-        ax.axis('equal')
-        plt.legend()
-        plt.title("Статистика по вирусу COVID-19", fontdict={'fontsize': 16})
+    for row in rows:
+        try:
+            if len(row) != 7:
+                raise ValueError(f"Expected 7 fields, got {len(row)}")
+            if row[6] not in inv_sts:
+                ERR_LOG.error("Неверный статус: '%s'", row[6])
+                raise ValueError("Invalid status")
+            results.append((check.global_check(*row[:6]), inv_sts[row[6]]))
+        except Exception as error:
+            results.append((error, None))
 
-        fig.savefig("result/chart_covid_19")
+    return results
@@ -0,0 +1,127 @@
+import copy
+from contextlib import closing
+from datetime import date
+
+FIELDS = ('first_name', 'last_name', 'birth_date', 'phone', 'document_type', 'document_id', 'status')
+
+
+def _field_index(name):
+    try:
+        return FIELDS.index(name)
+    except ValueError:
+        raise ValueError(f"Unknown field: {name}") from None
+
+
+def _iso_date(value):
+    return date.fromisoformat(str(value)).isoformat().encode()
+
+
+class Query:
+    """Ленивый запрос к записям .csv с цепочкой условий.
+
+    Записи читаются потоком за один проход, условия проверяются на байтах
+    строки до декодирования и создания Patient: сначала равенства, потом
+    диапазоны, и только потом функции-условия. Чтение прекращается, как
+    только набран limit. Каждый метод возвращает новый запрос, исходный
+    не меняется.
+
+    Значения полей сравниваются в том виде, в каком они записаны в .csv:
+    status="Болен", document_type="Паспорт РФ", birth_date="1978-01-31".
+    """
+
+    def __init__(self, patient_cls, source):
+        """source() возвращает итератор строк записей (bytes без перевода строки)."""
+        self._patient_cls = patient_cls
+        self._source = source
+        self._equal = {}
+        self._ranges = []
+        self._checks = []
+        self._fields = None
+        self._limit = None
+        self._empty = False
+
+    def _copy(self):
+        query = copy.copy(self)
+        query._equal = dict(self._equal)
+        query._ranges = list(self._ranges)
+        query._checks = list(self._checks)
+        return query
+
+    def where(self, **conditions):
+        """Поле равно значению или, если передана функция, функция от значения истинна."""
+        query = self._copy()
+        for name, value in conditions.items():
+            i = _field_index(name)
+            if callable(value):
+                query._checks.append((i, value))
+                continue
+            value = str(value).encode('utf-8')
+            if query._equal.setdefault(i, value) != value:
+                query._empty = True
+        return query
+
+    def born_between(self, start=None, end=None):
+        """Дата рождения от start до end включительно (ГГГГ-ММ-ДД или date, границы можно опустить)."""
+        query = self._copy()
+        query._ranges.append((FIELDS.index('birth_date'),
+                              None if start is None else _iso_date(start),
+                              None if end is None else _iso_date(end)))
+        return query
+
+    def select(self, *fields):
+        """Вместо пациентов выдавать кортежи значений указанных полей."""
+        query = self._copy()
+        query._fields = tuple(_field_index(name) for name in fields)
+        return query
+
+    def limit(self, count):
+        query = self._copy()
+        query._limit = count if query._limit is None else min(query._limit, count)
+        return query
+
+    def _matches(self):
+        if self._empty or self._limit == 0:
+            return
+
+        equal = tuple(self._equal.items())
+        ranges = tuple(self._ranges)
+        checks = tuple(self._checks)
+        found = 0
+
+        with closing(self._source()) as lines:
+            for line in lines:
+                parts = line.split(b',')
+                if len(parts) != len(FIELDS):
+                    continue
+                if any(parts[i] != value for i, value in equal):
+                    continue
+                if any((low is not None and parts[i] < low) or (high is not None and parts[i] > high)
+                       for i, low, high in ranges):
+                    continue
+
+                values = [part.decode('utf-8') for part in parts]
+                if any(not check(values[i]) for i, check in checks):
+                    continue
+
+                yield values
+                found += 1
+                if found == self._limit:
+                    return
+
+    def __iter__(self):
+        if self._fields is not None:
+            fields = self._fields
+            for values in self._matches():
+                yield tuple(values[i] for i in fields)
+            return
+
+        patient_cls = self._patient_cls
+        doc_types = patient_cls._INVERTED_DOCUMENT_TYPES
+        statuses = patient_cls._INVERTED_STATUSES
+        for values in self._matches():
+            yield patient_cls._from_trusted_row(values[0], values[1], values[2], values[3],
+                                                doc_types[values[4]], values[5], statuses[values[6]])
+
+    def count(self):
+        """Число подходящих записей (пациенты при этом не создаются)."""
+        return sum(1 for _ in self._matches())
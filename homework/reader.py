@@ -0,0 +1,62 @@
+import mmap
+import os
+
+
+class RowView:
+    """Строка .csv, прочитанная из отображённого в память файла.
+
+    Хранит только байты строки, поля декодируются при обращении к ним.
+    """
+
+    __slots__ = ('_line', 'offset')
+
+    def __init__(self, line, offset):
+        self._line = line
+        self.offset = offset
+
+    def raw(self, i):
+        """Поле i без декодирования."""
+        if i < 0:
+            return self._line.rsplit(b',', -i)[i]
+        return self._line.split(b',', i + 1)[i]
+
+    def __getitem__(self, i):
+        return self.raw(i).decode('utf-8')
+
+    def __len__(self):
+        return self._line.count(b',') + 1
+
+    def fields(self):
+        """Все поля сразу: быстрее, чем обращаться к каждому по отдельности."""
+        return self._line.decode('utf-8').split(',')
+
+    def line(self):
+        return self._line
+
+
+def iter_rows(path, start=None, stop=None):
+    """Построчно читает .csv через mmap и выдаёт RowView для каждой записи.
+
+    Границы строк ищутся в отображённом файле, в памяти одновременно
+    находится только текущая строка. start - смещение первой строки
+    (по умолчанию - строка после заголовка), stop - смещение, до которого читать.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            stop = len(buf) if stop is None else min(stop, len(buf))
+            if start is None:
+                buf.readline()
+            else:
+                buf.seek(start)
+
+            pos = buf.tell()
+            readline = buf.readline
+            while pos < stop:
+                line = readline()
+                offset, pos = pos, pos + len(line)
+                line = line.rstrip(b'\r\n')
+                if line:
+                    yield RowView(line, offset)
@@ -0,0 +1,61 @@
+from array import array
+
+_CODES = {None: 0, True: 1, False: 2}
+_VALUES = (None, True, False)
+_UNKNOWN_DECADE = -1
+
+
+def birth_decade(birth_date):
+    year = str(birth_date)[:4]
+    return int(year) // 10 * 10 if year.isdigit() else _UNKNOWN_DECADE
+
+
+class PatientStats:
+    """Счётчики по статусу, десятилетию рождения и типу документа.
+
+    На каждую запись хранится два числа (коды статуса и документа в одном
+    байте и десятилетие), чтобы при изменении пациента вычесть его старые
+    значения из счётчиков.
+    """
+
+    def __init__(self):
+        self._codes = array('B')
+        self._decades = array('h')
+        self._by_code = [0] * 9
+        self._by_decade = {}
+
+    def __len__(self):
+        return len(self._codes)
+
+    def add(self, row, patient):
+        code, decade = self._keys(patient)
+        self._codes.append(code)
+        self._decades.append(decade)
+        self._count(code, decade, 1)
+
+    def update(self, row, patient):
+        if row < len(self._codes):
+            self._count(self._codes[row], self._decades[row], -1)
+            self._codes[row], self._decades[row] = self._keys(patient)
+            self._count(self._codes[row], self._decades[row], 1)
+
+    @staticmethod
+    def _keys(patient):
+        if patient._status not in _CODES:
+            raise ValueError(f"Invalid Patient._status: {patient}")
+        return _CODES[patient._status] * 3 + _CODES[patient._document[0]], birth_decade(patient._birth_date)
+
+    def _count(self, code, decade, delta):
+        self._by_code[code] += delta
+        self._by_decade[decade] = self._by_decade.get(decade, 0) + delta
+        if not self._by_decade[decade]:
+            del self._by_decade[decade]
+
+    def statuses(self):
+        return {status: sum(self._by_code[_CODES[status] * 3:_CODES[status] * 3 + 3]) for status in _VALUES}
+
+    def document_types(self):
+        return {doc_type: sum(self._by_code[_CODES[doc_type]::3]) for doc_type in _VALUES}
+
+    def birth_decades(self):
+        return dict(sorted(self._by_decade.items()))
@@ -0,0 +1,448 @@
+import sqlite3
+import sys
+import threading
+import weakref
+from array import array
+from datetime import date
+
+from homework.indexes import phone_key, document_key, last_name_key
+from homework.journal import Journal
+from homework.offsets import OffsetIndex
+from homework.reader import iter_rows
+from homework.writer import commit
+
+_CODES = {None: 0, True: 1, False: 2}
+_VALUES = (None, True, False)
+
+_DOC_ID_LENGTHS = {None: 10, True: 9, False: 10}
+
+
+class ListStorage:
+    """Пациенты хранятся целиком, как объекты Patient."""
+
+    persistent = False
+
+    def __init__(self, patient_cls, owner=None, filename=None):
+        self._patient_cls = patient_cls
+        self._owner = owner
+        self._patients = []
+
+    def append(self, patient):
+        patient._owner = self._owner
+        patient._row = len(self._patients)
+        self._patients.append(patient)
+
+    def append_fields(self, first_name, last_name, birth_date, phone, doc_type, doc_id, status):
+        self.append(self._patient_cls._from_trusted_row(first_name, last_name, birth_date, phone,
+                                                        doc_type, doc_id, status))
+
+    def update(self, row, patient):
+        pass
+
+    def __getitem__(self, row):
+        return self._patients[row]
+
+    def __iter__(self):
+        return iter(self._patients)
+
+    def __len__(self):
+        return len(self._patients)
+
+
+class ColumnarStorage:
+    """Пациенты хранятся по столбцам в компактном виде.
+
+    Имена интернируются, дата рождения хранится как номер дня (int32),
+    телефон и номер документа - как числа, тип документа и статус - как
+    коды uint8. Значения, которые нельзя так упаковать, хранятся как есть.
+    Объекты Patient создаются только при обращении к записи, а их
+    изменения записываются обратно в столбцы.
+    """
+
+    persistent = False
+
+    def __init__(self, patient_cls, owner=None, filename=None):
+        self._patient_cls = patient_cls
+        self._owner = owner
+        self._first_names = []
+        self._last_names = []
+        self._birth_dates = array('i')
+        self._phones = array('q')
+        self._doc_types = array('B')
+        self._doc_ids = array('q')
+        self._statuses = array('B')
+        self._raw = {}
+
+    def append(self, patient):
+        self.append_fields(patient._first_name, patient._last_name, patient._birth_date, patient._phone,
+                           patient._document[0], patient._document[1], patient._status)
+
+    def append_fields(self, first_name, last_name, birth_date, phone, doc_type, doc_id, status):
+        row = len(self._statuses)
+        self._first_names.append(_intern(first_name))
+        self._last_names.append(_intern(last_name))
+        self._birth_dates.append(0)
+        self._phones.append(0)
+        self._doc_types.append(0)
+        self._doc_ids.append(0)
+        self._statuses.append(0)
+        self._set(row, birth_date, phone, doc_type, doc_id, status)
+
+    def update(self, row, patient):
+        self._first_names[row] = _intern(patient._first_name)
+        self._last_names[row] = _intern(patient._last_name)
+        self._set(row, patient._birth_date, patient._phone,
+                  patient._document[0], patient._document[1], patient._status)
+
+    def _set(self, row, birth_date, phone, doc_type, doc_id, status):
+        for field in ('birth_date', 'phone', 'doc_id'):
+            self._raw.pop((row, field), None)
+
+        ordinal = _pack_date(birth_date)
+        if ordinal is None:
+            self._raw[(row, 'birth_date')] = birth_date
+        else:
+            self._birth_dates[row] = ordinal
+
+        number = _pack_phone(phone)
+        if number is None:
+            self._raw[(row, 'phone')] = phone
+        else:
+            self._phones[row] = number
+
+        number = _pack_doc_id(doc_type, doc_id)
+        if number is None:
+            self._raw[(row, 'doc_id')] = doc_id
+        else:
+            self._doc_ids[row] = number
+
+        self._doc_types[row] = _CODES[doc_type]
+        self._statuses[row] = _CODES[status]
+
+    def columns(self):
+        """Упакованные столбцы и значения, которые упаковать не удалось:
+           ({столбец: array или list}, {(строка, поле): значение}).
+        """
+        return {'first_name': self._first_names, 'last_name': self._last_names,
+                'birth_date': self._birth_dates, 'phone': self._phones, 'doc_type': self._doc_types,
+                'doc_id': self._doc_ids, 'status': self._statuses}, self._raw
+
+    def extend_columns(self, columns, raw=()):
+        """Дописывает записи целыми столбцами в том же виде, что отдаёт columns().
+           Упакованные числовые столбцы передаются как bytes.
+        """
+        start = len(self)
+        self._first_names.extend(map(_intern, columns['first_name']))
+        self._last_names.extend(map(_intern, columns['last_name']))
+        self._birth_dates.frombytes(columns['birth_date'])
+        self._phones.frombytes(columns['phone'])
+        self._doc_types.frombytes(columns['doc_type'])
+        self._doc_ids.frombytes(columns['doc_id'])
+        self._statuses.frombytes(columns['status'])
+        for (row, field), value in raw:
+            self._raw[(start + row, field)] = value
+
+    def fields(self, row):
+        doc_type = _VALUES[self._doc_types[row]]
+        raw = self._raw
+
+        birth_date = raw[(row, 'birth_date')] if (row, 'birth_date') in raw \
+            else date.fromordinal(self._birth_dates[row]).isoformat()
+        phone = raw[(row, 'phone')] if (row, 'phone') in raw else _unpack_phone(self._phones[row])
+        doc_id = raw[(row, 'doc_id')] if (row, 'doc_id') in raw else _unpack_doc_id(doc_type, self._doc_ids[row])
+
+        return (self._first_names[row], self._last_names[row], birth_date, phone,
+                doc_type, doc_id, _VALUES[self._statuses[row]])
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("PatientCollection index out of range")
+
+        patient = self._patient_cls._from_trusted_row(*self.fields(row))
+        patient._owner = self._owner
+        patient._row = row
+        return patient
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def __len__(self):
+        return len(self._statuses)
+
+
+class FileStorage:
+    """Пациенты не загружаются в память: каждая запись читается из .csv
+    по индексу смещений (см. OffsetIndex), новые - сразу дописываются в файл,
+    изменения - в журнал рядом с ним (см. Journal) и накладываются при чтении.
+    """
+
+    persistent = True
+
+    def __init__(self, patient_cls, owner=None, filename='DB.csv'):
+        self._patient_cls = patient_cls
+        self._owner = owner
+        self._filename = filename
+        self.index = OffsetIndex(filename)
+        self.journal = Journal(filename)
+
+    def append(self, patient):
+        commit(self._filename, [patient._to_csv_line()])
+        patient._owner = self._owner
+        patient._row = len(self) - 1
+
+    def append_fields(self, first_name, last_name, birth_date, phone, doc_type, doc_id, status):
+        self.append(self._patient_cls._from_trusted_row(first_name, last_name, birth_date, phone,
+                                                        doc_type, doc_id, status))
+
+    def update(self, row, patient):
+        pass
+
+    def _view(self, row, line):
+        patient = self._patient_cls._from_csv_line(self.journal.patch_line(row, line).decode('utf-8'))
+        patient._owner = self._owner
+        patient._row = row
+        return patient
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("PatientCollection index out of range")
+        return self._view(row, self.index.read_line(row))
+
+    def __iter__(self):
+        for row, line in enumerate(iter_rows(self._filename)):
+            yield self._view(row, line.line())
+
+    def __len__(self):
+        return len(self.index)
+
+
+class SQLiteStorage:
+    """Пациенты хранятся в базе SQLite (filename - путь к файлу базы).
+
+    Новые записи вставляются пачками в одной транзакции, изменения
+    пациентов сразу записываются в их строку. Поиск по телефону,
+    документу и фамилии идёт по индексам базы (см. SQLiteIndexes).
+    """
+
+    persistent = True
+
+    def __init__(self, patient_cls, owner=None, filename='DB.sqlite', batch_size=1000):
+        self._patient_cls = patient_cls
+        self._owner = owner
+        self._batch_size = batch_size
+        self._pending = []
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+        self._len = self._conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+        self.indexes = SQLiteIndexes(self)
+        self._finalizer = weakref.finalize(self, _close_sqlite, self._conn, self._pending)
+
+    def append(self, patient):
+        with self._lock:
+            self._pending.append(_sqlite_row(self._len, patient._first_name, patient._last_name,
+                                             patient._birth_date, patient._phone, *patient._document,
+                                             patient._status))
+            patient._owner = self._owner
+            patient._row = self._len
+            self._len += 1
+            self.flush()
+
+    def append_fields(self, first_name, last_name, birth_date, phone, doc_type, doc_id, status):
+        with self._lock:
+            self._pending.append(_sqlite_row(self._len, first_name, last_name, birth_date, phone,
+                                             doc_type, doc_id, status))
+            self._len += 1
+            if len(self._pending) >= self._batch_size:
+                self.flush()
+
+    def flush(self):
+        """Записывает накопленные новые записи одной транзакцией."""
+        with self._lock:
+            _flush_sqlite(self._conn, self._pending)
+
+    def close(self):
+        self._finalizer()
+
+    def update(self, row, patient):
+        with self._lock:
+            self.flush()
+            values = _sqlite_row(row, patient._first_name, patient._last_name, patient._birth_date,
+                                 patient._phone, *patient._document, patient._status)
+            with self._conn:
+                self._conn.execute(f"UPDATE patients SET {', '.join(f'{name} = ?' for name in _SQLITE_COLUMNS[1:])} "
+                                   "WHERE id = ?", values[1:] + values[:1])
+
+    def _view(self, values):
+        patient = self._patient_cls._from_trusted_row(values[1], values[2], values[3], values[4],
+                                                      _VALUES[values[5]], values[6], _VALUES[values[7]])
+        patient._owner = self._owner
+        patient._row = values[0] - 1
+        return patient
+
+    def select(self, start=0, stop=None):
+        """Пациенты с номерами от start до stop по порядку добавления (читаются пачками)."""
+        with self._lock:
+            self.flush()
+        last_id = start
+        stop = self._len if stop is None else stop
+        while last_id < stop:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {_SQLITE_FIELDS} FROM patients WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                    (last_id, stop, self._batch_size)).fetchall()
+            if not rows:
+                break
+            for values in rows:
+                yield self._view(values)
+            last_id = rows[-1][0]
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("PatientCollection index out of range")
+        with self._lock:
+            self.flush()
+            values = self._conn.execute(f"SELECT {_SQLITE_FIELDS} FROM patients WHERE id = ?",
+                                        (row + 1,)).fetchone()
+        return self._view(values)
+
+    def __iter__(self):
+        return self.select()
+
+    def __len__(self):
+        return self._len
+
+
+class SQLiteIndexes:
+    """Тот же интерфейс, что у PatientIndexes, но поиск идёт по индексам SQLite.
+
+    Ключи (см. homework.indexes) хранятся в отдельных столбцах, поэтому
+    поддерживать что-то в памяти не нужно: add и update ничего не делают.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+
+    def __len__(self):
+        return len(self._storage)
+
+    def add(self, row, patient):
+        pass
+
+    def update(self, row, patient):
+        pass
+
+    def _rows(self, where, params):
+        storage = self._storage
+        with storage._lock:
+            storage.flush()
+            return [row_id - 1 for row_id, in storage._conn.execute(
+                f"SELECT id FROM patients WHERE {where} ORDER BY id", params)]
+
+    def find_by_phone(self, phone):
+        return self._rows("phone_key = ?", (phone_key(phone),))
+
+    def find_by_document(self, doc_type, doc_id):
+        doc_type, doc_key = document_key(doc_type, doc_id)
+        return self._rows("doc_type = ? AND doc_key = ?", (_CODES[doc_type], doc_key))
+
+    def find_by_last_name(self, last_name, prefix=False):
+        key = last_name_key(last_name)
+        if prefix:
+            return self._rows("last_name_key >= ? AND last_name_key < ?", (key, key + '\U0010ffff'))
+        return self._rows("last_name_key = ?", (key,))
+
+
+_SQLITE_COLUMNS = ('id', 'first_name', 'last_name', 'birth_date', 'phone', 'doc_id',
+                   'doc_type', 'status', 'phone_key', 'doc_key', 'last_name_key')
+_SQLITE_FIELDS = "id, first_name, last_name, birth_date, phone, doc_type, doc_id, status"
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT, last_name TEXT, birth_date TEXT, phone TEXT, doc_id TEXT,
+    doc_type INTEGER, status INTEGER,
+    phone_key TEXT, doc_key TEXT, last_name_key TEXT
+);
+CREATE INDEX IF NOT EXISTS patients_phone ON patients (phone_key);
+CREATE INDEX IF NOT EXISTS patients_document ON patients (doc_type, doc_key);
+CREATE INDEX IF NOT EXISTS patients_last_name ON patients (last_name_key);
+"""
+
+
+def _sqlite_row(row, first_name, last_name, birth_date, phone, doc_type, doc_id, status):
+    return (row + 1, first_name, last_name, str(birth_date), str(phone), str(doc_id),
+            _CODES[doc_type], _CODES[status],
+            phone_key(phone), document_key(doc_type, doc_id)[1], last_name_key(last_name))
+
+
+def _flush_sqlite(conn, pending):
+    if pending:
+        with conn:
+            conn.executemany(f"INSERT INTO patients ({', '.join(_SQLITE_COLUMNS)}) "
+                             f"VALUES ({', '.join('?' * len(_SQLITE_COLUMNS))})", pending)
+        pending.clear()
+
+
+def _close_sqlite(conn, pending):
+    _flush_sqlite(conn, pending)
+    conn.close()
+
+
+STORAGES = {"list": ListStorage, "columnar": ColumnarStorage, "file": FileStorage, "sqlite": SQLiteStorage}
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _pack_date(value):
+    if type(value) is not str:
+        return None
+    try:
+        packed = date.fromisoformat(value)
+    except ValueError:
+        return None
+    return packed.toordinal() if packed.isoformat() == value else None
+
+
+def _pack_phone(value):
+    if type(value) is not str or len(value) != 16:
+        return None
+    digits = ''.join(filter(str.isdigit, value))
+    if len(digits) != 11 or _unpack_phone(int(digits)) != value:
+        return None
+    return int(digits)
+
+
+def _unpack_phone(number):
+    num = str(number)
+    return f"+{num[0]}({num[1:4]}){num[4:7]}-{num[7:9]}-{num[9:11]}"
+
+
+def _pack_doc_id(doc_type, value):
+    if type(value) is not str:
+        return None
+    digits = ''.join(filter(str.isdigit, value))
+    if len(digits) != _DOC_ID_LENGTHS[doc_type] or _unpack_doc_id(doc_type, int(digits)) != value:
+        return None
+    return int(digits)
+
+
+def _unpack_doc_id(doc_type, number):
+    doc_id = str(number).zfill(_DOC_ID_LENGTHS[doc_type])
+    if doc_type:
+        return f"{doc_id[:2]} {doc_id[2:]}"
+    elif doc_type is None:
+        return f"{doc_id[:4]} {doc_id[4:]}"
+    else:
+        return f"{doc_id[:2]} {doc_id[2:4]} {doc_id[4:]}"
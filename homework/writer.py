@@ -0,0 +1,203 @@
+import os
+import threading
+from contextlib import contextmanager
+
+from homework import config, metrics
+from homework.loggers import INFO_LOG
+
+try:
+    import fcntl
+except ImportError:  # Windows: файл блокируется только между потоками этого процесса
+    fcntl = None
+
+FIELDNAMES = ('First name', 'Last name', 'Date of Birth',
+              'Phone number', 'Doc type', 'Doc number', 'Status')
+HEADER = ','.join(FIELDNAMES) + '\n'
+
+_thread_lock = threading.RLock()
+
+
+@contextmanager
+def locked(f):
+    """Исключительная блокировка открытого файла (flock) на время записи.
+
+    Все, кто пишет в .csv через этот модуль, берут её перед записью,
+    поэтому строки разных процессов не перемешиваются, а заголовок
+    пишется ровно один раз.
+    """
+    if fcntl is None:
+        with _thread_lock:
+            yield
+        return
+
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def locked_open(filename, mode='ab', **kwargs):
+    """Открывает файл и берёт его блокировку (см. locked).
+
+    Если, пока мы ждали блокировку, файл был заменён другим (os.replace при
+    сворачивании журнала изменений, см. homework.journal), открывается и
+    блокируется уже новый файл - иначе запись ушла бы в старый.
+    """
+    while True:
+        f = open(filename, mode, **kwargs)
+        try:
+            with locked(f):
+                try:
+                    current = os.stat(filename)
+                except FileNotFoundError:
+                    current = None
+                opened = os.fstat(f.fileno())
+                if current is not None and (current.st_ino, current.st_dev) == (opened.st_ino, opened.st_dev):
+                    yield f
+                    return
+        finally:
+            f.close()
+
+
+def write_all(fd, data):
+    """os.write, пока не будут записаны все данные."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+@metrics.timed("writer.flush")
+def append_lines(filename, lines):
+    """Дописывает строки в .csv одним системным вызовом под блокировкой файла.
+
+    Заголовок добавляется, если файл пуст в момент записи (а не в момент
+    открытия), при config.WRITE_FSYNC данные сразу сбрасываются на диск.
+    """
+    with locked_open(filename, 'ab') as f:
+        data = ''.join(lines).encode('utf-8')
+        if os.fstat(f.fileno()).st_size == 0:
+            data = HEADER.encode('utf-8') + data
+
+        write_all(f.fileno(), data)
+        if config.WRITE_FSYNC:
+            os.fsync(f.fileno())
+
+
+class GroupCommit:
+    """Общая очередь записи в один файл для всех потоков процесса.
+
+    Поток, который пришёл, когда файл никто не пишет, забирает строки
+    всех ожидающих потоков и записывает их одной пачкой (и одним fsync),
+    остальные ждут, пока их строки окажутся в файле. Если запись пачки
+    не удалась, ошибку получают все потоки, чьи строки были в ней.
+    """
+
+    def __init__(self, filename):
+        self._filename = filename
+        self._cond = threading.Condition()
+        self._pending = []
+        self._batch = 0
+        self._done = -1
+        self._writing = False
+        self._waiters = {}
+        self._errors = {}
+
+    def commit(self, lines):
+        with self._cond:
+            self._pending.extend(lines)
+            batch = self._batch
+            self._waiters[batch] = self._waiters.get(batch, 0) + 1
+
+            while self._done < batch:
+                if self._writing:
+                    self._cond.wait()
+                    continue
+
+                pending, self._pending = self._pending, []
+                self._batch += 1
+                self._writing = True
+                self._cond.release()
+                error = None
+                try:
+                    append_lines(self._filename, pending)
+                except Exception as e:
+                    error = e
+                finally:
+                    self._cond.acquire()
+                    self._writing = False
+                    self._done = batch
+                    if error:
+                        self._errors[batch] = error
+                    self._cond.notify_all()
+
+            # Ошибка пачки хранится, пока её не заберут все ждавшие её потоки.
+            self._waiters[batch] -= 1
+            if self._waiters[batch]:
+                error = self._errors.get(batch)
+            else:
+                del self._waiters[batch]
+                error = self._errors.pop(batch, None)
+            if error:
+                raise error
+
+
+_committers = {}
+_committers_lock = threading.Lock()
+
+
+def commit(filename, lines):
+    """Дописывает строки в файл вместе со строками других потоков (см. GroupCommit)."""
+    path = os.path.abspath(filename)
+    with _committers_lock:
+        committer = _committers.get(path)
+        if committer is None:
+            committer = _committers[path] = GroupCommit(path)
+    committer.commit(lines)
+
+
+class PatientWriter:
+    """Дописывает пациентов в .csv пачками, не перечитывая файл.
+
+    Строки сбрасываются в файл каждые batch_size записей и при закрытии,
+    каждая пачка - под блокировкой файла (см. append_lines), так что
+    в один файл могут одновременно писать несколько процессов.
+    Заголовок пишется только в пустой файл.
+    """
+
+    def __init__(self, filename='DB.csv', batch_size=1000):
+        self._filename = filename
+        self._batch_size = batch_size
+        self._buffer = []
+        self._written = 0
+        self._flushed = False
+        self._closed = False
+
+    def write(self, patient):
+        self._buffer.append(patient._to_csv_line())
+        self._written += 1
+        if len(self._buffer) >= self._batch_size:
+            self.flush()
+
+    def write_many(self, patients):
+        for patient in patients:
+            self.write(patient)
+
+    def flush(self):
+        if self._buffer or not self._flushed:
+            append_lines(self._filename, self._buffer)
+            self._buffer.clear()
+            self._flushed = True
+
+    def close(self):
+        if not self._closed:
+            self.flush()
+            self._closed = True
+            INFO_LOG.info("Записано пациентов в файл '%s': %s", self._filename, self._written)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,23 @@
+import pytest
+
+from homework import names
+
+
+@pytest.fixture()
+def known_names():
+    """(имена, фамилии), которые знает офлайн-источник из offline_names.
+
+    Модули переопределяют эту фикстуру или параметризуют её через
+    pytest.mark.parametrize('known_names', ...).
+    """
+    return (), ()
+
+
+@pytest.fixture()
+def offline_names(known_names):
+    """На время теста подменяет источник имён офлайн-списком known_names (с кэшем, как create_backend)."""
+    first_names, last_names = known_names
+    previous = names.get_backend()
+    names.set_backend(names.CachedNameBackend(names.OfflineNameBackend(first_names, last_names)))
+    yield
+    names.set_backend(previous)
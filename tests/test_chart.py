@@ -0,0 +1,37 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from homework.chart import ChartRenderer, render
+
+
+def test_render_formats():
+    assert render((5, 3, 1), 'png').startswith(b'\x89PNG'), "Wrong png output"
+    assert b'<svg' in render((5, 3, 1), 'svg'), "Wrong svg output"
+    with pytest.raises(ValueError):
+        render((5, 3, 1), 'bmp')
+    with pytest.raises(ValueError):
+        render((0, 0, 0))
+
+
+def test_renderer_cache(tmp_path):
+    renderer = ChartRenderer()
+    path = renderer.save((5, 3, 1), str(tmp_path / "chart"))
+    assert path.endswith("chart.png") and os.path.exists(path), "Chart was not saved"
+    mtime = os.stat(path).st_mtime_ns
+
+    assert renderer.save((5, 3, 1), str(tmp_path / "chart")) == path
+    assert renderer.render((5, 3, 1)) == open(path, 'rb').read(), "Cached bytes differ from the file"
+    assert renderer.renders == 1, "Same counts should not be rendered twice"
+    assert os.stat(path).st_mtime_ns == mtime, "Unchanged chart should not be rewritten"
+
+    renderer.save((5, 3, 2), str(tmp_path / "chart"))
+    assert renderer.renders == 2, "Changed counts should be rendered"
+
+
+def test_renderer_threads():
+    renderer = ChartRenderer()
+    with ThreadPoolExecutor(4) as executor:
+        charts = list(executor.map(lambda i: renderer.render((i + 1, 2, 1), 'svg'), range(8)))
+    assert len(set(charts)) == 8, "Charts rendered in threads should differ"
@@ -0,0 +1,49 @@
+import pytest
+
+from homework import check
+
+
+@pytest.mark.parametrize('doc_type,expected', [
+    ("ПАСПОРТ РФ", None), ("пАсПордик ФР", None), ("паспорт", None),
+    ("pfuhfybxysq gfcgjhn", True), ("загранчик", True),
+    ("djl/ghdf", False), ("права водителя", False),
+])
+def test_check_doc_type(doc_type, expected):
+    assert check.check_doc_type(doc_type) is expected, f"Wrong doc type for '{doc_type}'"
+
+
+def test_doc_type_classifier_cache():
+    classifier = check.DocTypeClassifier()
+    results = classifier.classify_many(["Паспорт РФ", "паспорт рф", "ПАСПОРТ РФ", "djl/ghdf"])
+    assert results[0] == results[1] == results[2], "Same spelling should give the same result"
+    assert results[3][2] == "вод.прва", "Layout should be switched for a low score"
+    assert classifier.classify.cache_info().misses == 2, "Every unique spelling should be scored once"
+
+    with pytest.raises(ValueError):
+        check.check_doc_type("12345")
+
+
+def test_normalize_frame():
+    import pandas as pd
+
+    columns = {
+        'First name': ["кондрат", "Ада1", 1.8, "Рон"],
+        'Last name': ["Коловрат", "Лавлейс", "Уизли", "уизли"],
+        'Date of Birth': ["1991---02---20", "1991.02.20", "ABCDEF", "20.02.1991"],
+        'Phone number': ["+7 (999) 333-22-11", 89_993_332_211, "+8(999)(333)22)11)", "123"],
+        'Doc type': ["ПАСПОРТ РФ", "pfuhfybxysq gfcgjhn", "djl/ghdf", "12345"],
+        'Doc number': ["(0123)(456789)", "12[3456789]", "01 23 456789", "0123456789"],
+        'Status': ["Болен"] * 4,
+    }
+    result, errors = check.normalize_frame(columns)
+
+    assert errors.tolist() == [False, True, True, True], "Wrong error mask"
+    assert result.iloc[0].tolist() == ["Кондрат", "Коловрат", "1991-02-20", "+7(999)333-22-11",
+                                       "Паспорт РФ", "0123 456789", "Болен"], "Wrong normalized row"
+    for i in range(4):
+        if isinstance(columns['Date of Birth'][i], str) and i != 2:
+            assert result['Date of Birth'][i] == check.check_birth_date(columns['Date of Birth'][i]), "Wrong date"
+    assert pd.isna(result['Date of Birth'][2]), "Wrong date should be removed"
+    assert result['Phone number'][1] == check.check_phone(columns['Phone number'][1]), "Wrong int phone"
+    assert pd.isna(result['Phone number'][3]), "Wrong phone should be removed"
+    assert result['Doc number'][1] == "12 3456789" and result['Doc number'][2] == "01 23 456789", "Wrong doc id"
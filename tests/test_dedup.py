@@ -0,0 +1,41 @@
+from homework import dedup
+from homework.patient import PatientCollection, Patient
+
+RECORDS = [
+    ("Кондрат", "Коловрат", "1978-01-31", "+7(916)000-00-00", None, "0228 000000"),
+    ("Ада", "Лавлейс", "1978-01-21", "+7(916)000-00-02", None, "0228 000002"),
+    ("Кондрат", "Каловрат", "1978-01-13", "+7(916)000-00-09", None, "0228 000009"),
+    ("Евпатий", "Коловрат", "1972-01-11", "+7(916)000-00-01", None, "0228 000001"),
+    ("Flf", "Лавлейс", "1978-01-21", "+7(916)000-00-02", None, "0228 000012"),
+    ("Рон", "Уизли", "1900-04-20", "+7(916)000-00-07", True, "02 2800007"),
+    ("Рональд", "Уизли", "1980-03-01", "+7(916)000-00-17", True, "02 2800007"),
+    ("Билл", "Гейтс", "1978-12-31", "+7(916)000-00-08", None, "0228 000008"),
+]
+
+
+def test_phonetic_key():
+    assert dedup.phonetic_key("Коловрат") == dedup.phonetic_key("Каловрад"), "Similar names should match"
+    assert dedup.phonetic_key("Rjkjdhfn") == dedup.phonetic_key("Коловрат"), "Wrong layout should match"
+    assert dedup.phonetic_key("Коловрат") != dedup.phonetic_key("Лавлейс"), "Different names should differ"
+
+
+def test_candidate_pairs_are_unique():
+    pairs = dedup.candidate_pairs(RECORDS * 3)
+    assert iter(pairs) is pairs, "Pairs should be yielded block by block"
+    pairs = list(pairs)
+    assert len(pairs) == len(set(pairs)), "A pair from several blocks should be yielded once"
+    assert {(0, 2), (1, 4), (5, 6), (0, 8)} <= set(pairs), "Pairs sharing a block are lost"
+
+
+def test_find_duplicates():
+    groups = dedup.find_duplicates(RECORDS)
+    assert sorted(groups) == [[0, 2], [1, 4], [5, 6]], "Wrong duplicate groups"
+
+
+def test_collection_find_duplicates():
+    collection = PatientCollection()
+    for record in RECORDS:
+        collection._storage.append(Patient._from_trusted_row(*record))
+    groups = collection.find_duplicates()
+    assert [[patient.document_id for patient in group] for group in groups][0] == \
+        ["0228 000000", "0228 000009"], "Wrong patients in a duplicate group"
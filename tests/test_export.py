@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from homework import export
+from homework.patient import Patient, PatientCollection
+from homework.writer import PatientWriter, HEADER
+
+ROWS = [("Кондрат", "рюрик", "1971-01-11", "+7(916)000-00-00", None, "0228 000000", None),
+        ("Ада", "Лавлейс", "1978-01-21", "+7(916)000-00-02", True, "02 2800002", False),
+        ("Миртл", "Плакса", "1880-01-11", "+7(916)000-00-03", None, "0228 000003", None),
+        ("Рон", "Уизли", "1900-04-20", "+7(916)000-00-07", False, "02 28 000007", True),
+        ("Гарри", "Поттер", "1980-07-31", "+7(916)000-00-06", None, "0228 000006", None),
+        ("Кузя", "Лавлейс", "1978-01-05", "+7(916)000-00-05", None, "0228 000005", None)]
+
+
+@pytest.fixture()
+def collection(tmp_path):
+    path = str(tmp_path / "DB.csv")
+    with PatientWriter(path) as writer:
+        writer.write_many(Patient._from_trusted_row(*row) for row in ROWS)
+    return PatientCollection(path, storage="file")
+
+
+def read_column(path, i):
+    with open(path, encoding='utf-8') as f:
+        assert f.readline() == HEADER, "Header is missing"
+        return [line.rstrip('\n').split(',')[i] for line in f]
+
+
+@pytest.mark.parametrize('memory_budget', [None, 1, 300])
+def test_export_sorted(collection, tmp_path, memory_budget):
+    path = str(tmp_path / "sorted.csv")
+    assert collection.export_sorted("birth_date", path, memory_budget=memory_budget) == len(ROWS)
+    assert read_column(path, 2) == sorted(row[2] for row in ROWS), "Wrong order by birth date"
+
+    collection.export_sorted(("last_name", "first_name"), path, reverse=True, memory_budget=memory_budget)
+    assert read_column(path, 0) == ["Рон", "Кондрат", "Гарри", "Миртл", "Кузя", "Ада"], "Wrong order by name"
+    assert set(os.listdir(tmp_path)) <= {"DB.csv", "DB.csv.idx", "sorted.csv"}, "Temporary files should be removed"
+
+
+def test_many_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "_MAX_FAN_IN", 2)
+    lines = [f"Имя,Фамилия,{year}-01-01,+7(916)000-00-00,Паспорт РФ,0228 000000,Болен".encode('utf-8')
+             for year in range(2000, 1900, -1)]
+    path = str(tmp_path / "sorted.csv")
+    export.sort_lines(lines, export.sort_key("birth_date"), path, memory_budget=1)
+    assert read_column(path, 2) == [f"{year}-01-01" for year in range(1901, 2001)], "Wrong multi-pass merge"
+
+
+def test_partition_by(collection, tmp_path):
+    paths = collection.partition_by("status", str(tmp_path / "parts"))
+    assert sorted(paths) == ["Болен", "Выздоровел", "Умер"], "Wrong partitions"
+    assert os.path.basename(paths["Болен"]) == "DB_Болен.csv", "Wrong partition file name"
+    assert read_column(paths["Болен"], 0) == ["Кондрат", "Миртл", "Гарри", "Кузя"], "Wrong partition content"
+
+    paths = collection.partition_by("birth_year", str(tmp_path / "years"))
+    assert read_column(paths["1978"], 0) == ["Ада", "Кузя"], "Wrong partition by birth year"
+    assert len(PatientCollection(paths["1978"])) == 2, "Partition should be a valid DB file"
+
+
+def test_partition_reopens_files(tmp_path):
+    lines = [f"Имя,Фамилия,{1900 + i % 5}-01-01,+7(916)000-00-00,Паспорт РФ,0228 {i:06d},Болен".encode('utf-8')
+             for i in range(20)]
+    paths = export.partition_lines(lines, "birth_year", str(tmp_path), max_open=2)
+    assert len(paths) == 5, "Wrong number of partitions"
+    assert read_column(paths["1901"], 5) == [f"0228 {i:06d}" for i in range(1, 20, 5)], \
+        "Rows are lost when a partition file is reopened"
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+import homework
+
+HEAVY_MODULES = ("pandas", "matplotlib", "requests", "bs4", "fuzzywuzzy")
+ROOT = os.path.dirname(os.path.dirname(homework.__file__))
+
+
+def run_python(code, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True).stdout
+
+
+def test_import_is_lazy(tmp_path):
+    out = run_python("import sys, homework.patient, homework.check; "
+                     f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])", tmp_path)
+    assert out.strip() == "", f"Heavy modules imported eagerly: {out}"
+    assert not os.listdir(tmp_path), "Log files should not be created at import"
+
+
+def test_lazy_module_loads_on_use(tmp_path):
+    out = run_python("import sys; from homework.patient import pd; "
+                     "print('pandas' in sys.modules, pd.DataFrame is sys.modules['pandas'].DataFrame, "
+                     "'pandas' in sys.modules)", tmp_path)
+    assert out.split() == ["False", "True", "True"], "Lazy module should import on first attribute access"
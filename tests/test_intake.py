@@ -0,0 +1,99 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit, parse_qs
+
+import pytest
+
+from homework import config, names
+from homework.config import PASSPORT_TYPE
+from homework.patient import PatientCollection, Patient
+
+FIRST_NAMES = {"Кондрат", "Евпатий", "Ада"}
+LAST_NAMES = {"рюрик", "коловрат", "лавлейс"}
+
+
+class NamesHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        NamesHandler.requests.append(unquote(self.path))
+
+        if url.path.startswith("/search/"):
+            name = parse_qs(url.query)["text"][0]
+            body = f"<a>{name}</a>" if name in FIRST_NAMES else "<a>Ничего</a>"
+        else:
+            name = unquote(url.path.rsplit('/', 1)[-1])
+            body = '<span class="version-number">1</span>' if name in LAST_NAMES else ""
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def names_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NamesHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(config, "FIRST_NAME_URL", host + "/search/?text={}")
+    monkeypatch.setattr(config, "LAST_NAME_URL", host + "/names/order/{}")
+    previous = names.get_backend()
+    names.set_backend(names.CachedNameBackend(names.OnlineNameBackend(pool_size=4)))
+    NamesHandler.requests = []
+
+    yield NamesHandler.requests
+
+    names.set_backend(previous)
+    server.shutdown()
+    server.server_close()
+
+
+RECORDS = [
+    ("Кондрат", "Рюрик", "1971-01-11", "79160000000", PASSPORT_TYPE, "0228 000000"),
+    ("Евпатий", "Коловрат", "1972-01-11", "79160000001", PASSPORT_TYPE, "0228 000001"),
+    ("Кондрат", "Коловрат", "1978-01-21", "79160000002", PASSPORT_TYPE, "0228 000002"),
+    ("Ада", "Лавлейс", "1978-01-21", "79160000003", PASSPORT_TYPE, "00"),
+    {"first_name": "Ада", "last_name": "Рюрик", "birth_date": "1999-01-21",
+     "phone": "79160000004", "doc_type": PASSPORT_TYPE, "doc_id": "0228 000004"},
+    ("Ада", 1.8, "1999-01-21", "79160000005", PASSPORT_TYPE, "0228 000005"),
+    {"first_name": "Ада", "last_name": "Рюрик"},
+]
+
+
+def test_add_many(names_server):
+    collection = PatientCollection()
+    results = collection.add_many(RECORDS, concurrency=4)
+
+    assert len(results) == len(RECORDS), "Result for every record is expected"
+    assert isinstance(results[3], ValueError), "Wrong doc id should be reported"
+    assert isinstance(results[5], TypeError), "Wrong last name should be reported"
+    assert isinstance(results[6], KeyError), "A record with missing fields should be reported"
+    assert len(collection) == 4, "Good records should be added"
+    for result, record in zip(results[:3], RECORDS):
+        assert isinstance(result, Patient), "Patient should be returned for a good record"
+        assert result.first_name == record[0], "Wrong attr first_name"
+    assert results[4].last_name == "Рюрик", "Wrong attr last_name for a dict record"
+
+    assert len(names_server) == 6, "Every unique name should be requested once"
+
+
+def test_add_many_unreachable_server(monkeypatch):
+    monkeypatch.setattr(config, "FIRST_NAME_URL", "http://127.0.0.1:9/search/?text={}")
+    monkeypatch.setattr(config, "LAST_NAME_URL", "http://127.0.0.1:9/names/order/{}")
+    previous = names.get_backend()
+    names.set_backend(names.CachedNameBackend(names.OnlineNameBackend(timeout=1)))
+    try:
+        collection = PatientCollection()
+        results = collection.add_many(RECORDS[:2])
+    finally:
+        names.set_backend(previous)
+
+    assert all(isinstance(result, Exception) for result in results), "Network errors should be reported"
+    assert len(collection) == 0, "Nothing should be added"
@@ -0,0 +1,172 @@
+import os
+import threading
+
+import pytest
+
+from homework import config
+from homework.patient import Patient, PatientCollection
+from homework.writer import PatientWriter
+
+ROWS = [("Кондрат", "Рюрик", "1971-01-11", "+7(916)000-00-00", None, "0228 000000", None),
+        ("Ада", "Лавлейс", "1978-01-21", "+7(916)000-00-02", True, "02 2800002", None),
+        ("Миртл", "Плакса", "1880-01-11", "+7(916)000-00-03", None, "0228 000003", None)]
+
+
+@pytest.fixture()
+def path(tmp_path):
+    path = str(tmp_path / "DB.csv")
+    with PatientWriter(path) as writer:
+        writer.write_many(Patient._from_trusted_row(*row) for row in ROWS)
+    return path
+
+
+@pytest.fixture()
+def known_names():
+    return [row[0] for row in ROWS] + ["Гарри"], [row[1] for row in ROWS] + ["Поттер"]
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def change(collection):
+    collection[0].recovered()
+    collection[2].dead()
+    collection[2].phone = "+7(916)111-11-11"
+
+
+def check_changed(collection):
+    assert [patient._status for patient in collection] == [True, None, False], "Status changes are lost"
+    assert collection[2].phone == "+7(916)111-11-11", "Phone change is lost"
+    assert [patient.phone for patient in collection.limit(3)][2] == "+7(916)111-11-11", "limit ignores the journal"
+    assert collection.query().where(status="Умер").count() == 1, "query ignores the journal"
+
+
+@pytest.mark.parametrize('storage', ["list", "columnar", "file"])
+def test_changes_survive_reload(path, storage):
+    before = read(path)
+    change(PatientCollection(path, storage=storage))
+
+    assert read(path) == before, "The base file should not be rewritten on change"
+    check_changed(PatientCollection(path, storage=storage))
+    check_changed(PatientCollection(path, by_pandas=True))
+    assert [patient._status for patient in PatientCollection.from_csv(path, validate=False)[0]] == \
+        [True, None, False], "from_csv ignores the journal"
+
+
+@pytest.mark.usefixtures('offline_names')
+def test_blank_lines_keep_row_numbers(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:2] + ["\n"] + lines[2:])
+
+    collection, errors = PatientCollection.from_csv(path)
+    assert errors == [], "Blank lines should be skipped"
+    collection[2].dead()
+
+    for reloaded in (PatientCollection(path), PatientCollection(path, storage="file"),
+                     PatientCollection.from_csv(path)[0]):
+        assert [patient._status for patient in reloaded] == [None, None, False], "Journal row numbers drifted"
+
+
+@pytest.mark.usefixtures('offline_names')
+def test_unsaved_patients_are_not_journaled(path):
+    collection = PatientCollection(path)
+    collection.add("Гарри", "Поттер", "1980-07-31", "79160000006", config.PASSPORT_TYPE, "0228 000006")
+    collection[3].recovered()
+    assert not os.path.exists(path + ".journal"), "A patient not yet in the file should not be journaled"
+
+    collection.save_all()
+    assert PatientCollection(path)[3]._status is True, "save_all should write the current status"
+
+
+@pytest.fixture()
+def path_with_invalid_row(tmp_path):
+    """Вторая запись с неверным телефоном: from_csv её пропустит."""
+    path = str(tmp_path / "DB.csv")
+    rows = [ROWS[0], ROWS[1][:3] + ("123",) + ROWS[1][4:], ROWS[2]]
+    with PatientWriter(path) as writer:
+        writer.write_many(Patient._from_trusted_row(*row) for row in rows)
+    return path
+
+
+@pytest.mark.usefixtures('offline_names')
+def test_skipped_invalid_rows(path_with_invalid_row):
+    path = path_with_invalid_row
+    collection, errors = PatientCollection.from_csv(path)
+    assert [line_num for line_num, error in errors] == [3], "The row with a bad phone should be skipped"
+    collection[1].dead()
+
+    assert [patient._status for patient in PatientCollection(path)] == [None, None, False], \
+        "Change should be journaled against the file row, not the collection row"
+
+
+@pytest.mark.usefixtures('offline_names')
+def test_skipped_invalid_rows_then_save_all(path_with_invalid_row):
+    path = path_with_invalid_row
+    collection, errors = PatientCollection.from_csv(path)
+    collection.add("Гарри", "Поттер", "1980-07-31", "79160000006", config.PASSPORT_TYPE, "0228 000006")
+    collection.save_all()
+    collection[2].recovered()
+
+    assert [patient._status for patient in PatientCollection(path)] == [None, None, None, True], \
+        "Change of a saved new patient should be journaled against its file row"
+
+
+def test_compact(path):
+    collection = PatientCollection(path, storage="file")
+    assert collection.compact() == 0, "Nothing to compact yet"
+    change(collection)
+
+    assert collection.compact() == 2, "Wrong number of compacted rows"
+    assert os.path.getsize(path + ".journal") == 0, "Journal should be empty after compaction"
+    assert read(path).count(b"\n") == len(ROWS) + 1, "Rows are lost or duplicated"
+    check_changed(PatientCollection(path))
+    check_changed(collection)
+    assert [patient.phone for patient in collection.slice(2)] == ["+7(916)111-11-11"], "Offsets are stale"
+
+
+def test_background_compaction(path, monkeypatch):
+    collection = PatientCollection(path)
+    change(collection)
+    monkeypatch.setattr(config, 'JOURNAL_COMPACT_SIZE', os.path.getsize(path + ".journal") + 1)
+    collection[1].dead()
+    collection._journal.wait()
+
+    assert os.path.getsize(path + ".journal") == 0, "Journal should be compacted in the background"
+    assert [patient._status for patient in PatientCollection(path)] == [True, False, False], "Changes are lost"
+
+
+def test_appends_during_compaction(path):
+    collection = PatientCollection(path, storage="file")
+    saved = [Patient._from_trusted_row("Гарри", "Поттер", "1980-07-31", "+7(916)000-00-06",
+                                       None, f"0228 {i:06d}", None) for i in range(200)]
+    saver = threading.Thread(target=lambda: [patient.save(path) for patient in saved])
+    saver.start()
+    while saver.is_alive():
+        if collection[0]._status is None:
+            collection[0].recovered()
+        else:
+            collection[0].dead()
+        collection.compact()
+    saver.join()
+    collection.compact()
+
+    lines = read(path).decode('utf-8').splitlines()
+    assert len(lines) == len(ROWS) + len(saved) + 1, "Rows written during compaction are lost"
+    assert sorted(lines[len(ROWS) + 1:]) == sorted(patient._to_csv_line().rstrip('\n') for patient in saved), \
+        "Rows written during compaction are broken"
+    assert PatientCollection(path)[0]._status == collection[0]._status, "Status change is lost"
+
+
+def test_torn_entry_is_ignored(path):
+    with open(path + ".journal", 'wb') as f:
+        f.write("0,status,Выздоровел\n2,status,Уме".encode('utf-8'))
+    collection = PatientCollection(path)
+    assert [patient._status for patient in collection] == [True, None, None], "Torn entry should be ignored"
+
+    collection[1].dead()
+    with open(path + ".journal", encoding='utf-8') as f:
+        assert f.read() == "0,status,Выздоровел\n1,status,Умер\n", "Torn entry should be cut off"
@@ -0,0 +1,62 @@
+import pytest
+
+from homework import config, loader
+from homework.patient import Patient, PatientCollection
+from homework.writer import PatientWriter
+
+ROWS = [("Кондрат", "Рюрик", "1971-01-11", "+7(916)000-00-00", None, "0228 000000", None),
+        ("Ада", "Лавлейс", "1978-01-21", "+7(916)000-00-02", True, "02 2800002", False),
+        ("Миртл", "Плакса", "1880-01-11", "79160000003", None, "0228 000003", None),
+        ("Рон", "Уизли", "1900-04-20", "+7(916)000-00-07", False, "02 28 000007", True),
+        ("Гарри", "Поттер", "1980-07-31", "+7(916)000-00-06", None, NotImplemented, None)] * 7
+
+
+@pytest.fixture()
+def path(tmp_path):
+    path = str(tmp_path / "DB.csv")
+    with PatientWriter(path) as writer:
+        writer.write_many(Patient._from_trusted_row(*row) for row in ROWS)
+    return path
+
+
+def test_byte_ranges(path):
+    with open(path, 'rb') as f:
+        lines = f.readlines()[1:]
+
+    for parts in (1, 2, 3, 8, 100):
+        ranges = loader.byte_ranges(path, parts, min_size=1)
+        assert 1 <= len(ranges) <= parts, f"Wrong number of ranges for {parts} parts"
+        with open(path, 'rb') as f:
+            chunks = []
+            for start, stop in ranges:
+                f.seek(start)
+                chunks.append(f.read(stop - start))
+        assert all(chunk.endswith(b"\n") for chunk in chunks), "Ranges should end at line boundaries"
+        assert b"".join(chunks) == b"".join(lines), "Ranges should cover every record exactly once"
+
+    assert len(loader.byte_ranges(path, 8)) == 1, "A small file should not be split"
+
+
+def test_parallel_load(path, monkeypatch):
+    storage = "columnar"
+    monkeypatch.setattr(config, 'LOAD_CHUNK_SIZE', 1)
+    expected = [str(patient) for patient in PatientCollection(path, storage=storage)]
+
+    collection = PatientCollection(path, storage=storage, workers=3)
+    assert [str(patient) for patient in collection] == expected, "Parallel load should keep records and order"
+
+    collection[1].recovered()
+    collection[3].phone = "+7(916)111-11-11"
+    reloaded = PatientCollection.from_csv(path, validate=False, workers=3, storage=storage)[0]
+    assert (reloaded[1]._status, reloaded[3].phone) == (True, "+7(916)111-11-11"), "Journal is not applied"
+    assert len(reloaded) == len(ROWS), "Records are lost"
+
+    with pytest.raises(ValueError):
+        PatientCollection(path, workers=3)
+
+
+def test_serial_by_default(path, monkeypatch):
+    monkeypatch.setattr(config, 'LOAD_CHUNK_SIZE', 1)
+    monkeypatch.setattr(loader, 'load_columns', None)
+    collection, errors = PatientCollection.from_csv(path, validate=False)
+    assert len(collection) == len(ROWS), "Unvalidated from_csv should load in one process by default"
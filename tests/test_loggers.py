@@ -0,0 +1,35 @@
+from logging.handlers import QueueHandler
+
+from homework import config, loggers
+from homework.loggers import INFO_LOG, ERR_LOG
+
+
+class Counted:
+    calls = 0
+
+    def __str__(self):
+        Counted.calls += 1
+        return "counted"
+
+
+def test_async_logging(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "GOOD_LOG_FILE", str(tmp_path / "info.log"))
+    monkeypatch.setattr(config, "ERROR_LOG_FILE", str(tmp_path / "errors.log"))
+    loggers.setup_logging(async_logging=True)
+    try:
+        for i in range(250):
+            INFO_LOG.info("Запись %s", i)
+        ERR_LOG.error("Ошибка")
+        INFO_LOG.debug("Не пишется: %s", Counted())
+        assert Counted.calls == 0, "Message for a disabled level should not be formatted"
+    finally:
+        loggers.shutdown_logging()
+        monkeypatch.undo()
+        loggers.setup_logging()
+
+    lines = (tmp_path / "info.log").read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 250, "All records should be written at shutdown"
+    assert lines[-1].endswith("INFO | Запись 249"), "Wrong record format"
+    assert (tmp_path / "errors.log").read_text(encoding='utf-8').count("Ошибка") == 1, "Error is not written"
+    assert not any(isinstance(h, QueueHandler) for h in INFO_LOG.handlers), \
+        "Synchronous handlers should be restored"
@@ -0,0 +1,64 @@
+import pytest
+
+from homework import check, metrics
+from homework.config import PASSPORT_TYPE
+from homework.patient import Patient, PatientCollection
+
+
+@pytest.fixture()
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+
+@pytest.fixture()
+def known_names():
+    return ["Кондрат"], ["Рюрик"]
+
+
+def test_disabled_records_nothing():
+    metrics.reset()
+    check.check_phone("+7(916)000-00-00")
+    assert metrics.snapshot()['histograms'] == {}, "Disabled metrics should not record calls"
+
+
+@pytest.mark.usefixtures('enabled_metrics')
+def test_timed_calls_and_errors():
+    check.check_phone("+7(916)000-00-00")
+    with pytest.raises(ValueError):
+        check.check_phone("123")
+
+    data = metrics.snapshot()
+    histogram = data['histograms']['check.check_phone']
+    assert histogram['count'] == 2, "Wrong number of calls"
+    assert histogram['buckets'][float('inf')] == 2, "Buckets should be cumulative"
+    assert data['counters']['check.check_phone.errors'] == 1, "Wrong number of errors"
+
+
+@pytest.mark.usefixtures('enabled_metrics', 'offline_names')
+def test_load_save_and_caches(tmp_path):
+    path = str(tmp_path / "db.csv")
+    patient = Patient("Кондрат", "Рюрик", "1971-01-11", "79160000000", PASSPORT_TYPE, "0228 000000")
+    patient.save(path)
+    patient.phone = "79160000001"
+    PatientCollection(path)
+
+    data = metrics.snapshot()
+    for name in ("check.global_check", "patient.save", "patient.set_phone", "writer.flush", "collection.load"):
+        assert data['histograms'][name]['count'] >= 1, f"No calls recorded for {name}"
+    assert set(data['caches']) >= {"names", "doc_types"}, "Cache hit rates are missing"
+    assert 0 <= data['caches']['doc_types']['hit_rate'] <= 1
+
+
+@pytest.mark.usefixtures('enabled_metrics')
+def test_dump_prometheus(tmp_path):
+    check.check_birth_date("1991-02-20")
+    path = metrics.dump_prometheus(str(tmp_path / "metrics.prom"))
+
+    text = open(path, encoding='utf-8').read()
+    assert 'homework_call_seconds_count{name="check.check_birth_date"} 1' in text, "Wrong histogram count"
+    assert 'homework_call_seconds_bucket{name="check.check_birth_date",le="+Inf"} 1' in text
+    assert 'homework_cache_hits_total{cache="doc_types"}' in text, "Cache metrics are missing"
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from homework import names
+
+
+class CountingBackend(names.NameBackend):
+    def __init__(self, known):
+        self.known = set(known)
+        self.calls = 0
+
+    def lookup(self, kind, name):
+        self.calls += 1
+        return name in self.known
+
+
+def test_cache_repeated_names():
+    source = CountingBackend(["Кондрат"])
+    backend = names.CachedNameBackend(source, maxsize=10, ttl=60)
+    for _ in range(5):
+        assert backend.has_first_name("Кондрат"), "Known name is not found"
+        assert not backend.has_first_name("Абырвалг"), "Unknown name is found"
+    assert source.calls == 2, "Repeated names should be taken from the cache"
+
+
+def test_cache_ttl_and_size():
+    source = CountingBackend(["Кондрат", "Ада"])
+    backend = names.CachedNameBackend(source, maxsize=1, ttl=0)
+    backend.has_first_name("Кондрат")
+    backend.has_first_name("Кондрат")
+    assert source.calls == 2, "Expired entry should be looked up again"
+
+    backend = names.CachedNameBackend(source, maxsize=1, ttl=60)
+    backend.has_first_name("Кондрат")
+    backend.has_first_name("Ада")
+    assert backend.peek(names.FIRST_NAME, "Кондрат") is None, "LRU entry should be evicted"
+
+
+def test_disk_cache(tmp_path):
+    path = str(tmp_path / "names.sqlite3")
+    source = CountingBackend(["Коловрат"])
+    names.CachedNameBackend(source, path=path).has_last_name("Коловрат")
+    assert names.CachedNameBackend(source, path=path).has_last_name("Коловрат"), "Wrong result from disk cache"
+    assert source.calls == 1, "Persistent cache is not used"
+
+
+def test_offline_backend(tmp_path):
+    first_names = tmp_path / "first.txt"
+    first_names.write_text("Кондрат\nада\n", encoding='utf-8')
+    backend = names.OfflineNameBackend(last_names=["Коловрат"], first_names_file=str(first_names))
+    assert backend.has_first_name("Ада"), "Name from the file is not found"
+    assert not backend.has_first_name("Евпатий"), "Unknown name is found"
+    assert backend.has_last_name("Коловрат"), "Last name from the list is not found"
+
+
+def test_check_uses_backend():
+    from homework import check
+
+    previous = names.get_backend()
+    names.set_backend(names.OfflineNameBackend(["Кондрат"], ["Коловрат"]))
+    try:
+        assert check.check_first_name("кондрат") == "Кондрат", "Wrong first name"
+        assert check.check_last_name("КОЛОВРАТ") == "Коловрат", "Wrong last name"
+        with pytest.raises(ValueError):
+            check.check_first_name("К0ндрат")
+    finally:
+        names.set_backend(previous)
+
+
+def test_check_many_looks_up_each_name_once():
+    from homework import check
+
+    source = CountingBackend(["Кондрат", "Коловрат"])
+    previous = names.get_backend()
+    names.set_backend(source)
+    try:
+        record = ("Кондрат", "Коловрат", "1971-01-11", "79160000000", "паспорт", "0228 000000")
+        results = asyncio.run(check.global_check_many([record] * 3))
+        assert [result['first_name'] for result in results] == ["Кондрат"] * 3, "Wrong check results"
+        assert source.calls == 2, "global_check should reuse the prefetched answers"
+
+        asyncio.run(names.prefetch([(names.FIRST_NAME, "Ада")]))
+        executor = names._lookup_executor()
+        asyncio.run(names.prefetch([(names.FIRST_NAME, "Ада")]))
+        assert names._lookup_executor() is executor, "prefetch should reuse one thread pool"
+    finally:
+        names.set_backend(previous)
@@ -0,0 +1,50 @@
+import pytest
+
+from homework import convert, npz
+from homework.patient import Patient, PatientCollection
+from homework.storage import ColumnarStorage
+
+ROWS = [("Кондрат", "Рюрик", "1971-01-11", "+7(916)000-00-00", None, "0228 000000", None),
+        ("Ада", "Лавлейс", "1978-01-21", "+7(916)000-00-02", True, "02 2800002", False),
+        ("Миртл", "Плакса", "1880/01/11", "916-000-00-03", False, "NotImplemented", True),
+        ("Рон", "Уизли", "1900-04-20", "+7(916)000-00-07", None, "0228 000007", False)]
+
+
+@pytest.fixture()
+def npz_path(tmp_path):
+    storage = ColumnarStorage(Patient)
+    for row in ROWS:
+        storage.append_fields(*row)
+    path = str(tmp_path / "DB.npz")
+    npz.save(storage, path)
+    return path
+
+
+def test_round_trip(npz_path):
+    storage = npz.load(npz_path, ColumnarStorage(Patient))
+    assert [storage.fields(row) for row in range(len(storage))] == ROWS, "Wrong round trip"
+
+
+def test_projection_and_predicates(npz_path):
+    assert npz.read_columns(npz_path, ['last_name']) == {'last_name': [row[1] for row in ROWS]}
+    assert npz.read_columns(npz_path, ['first_name', 'birth_date'], where={'status': False}) == \
+        {'first_name': ["Ада", "Рон"], 'birth_date': ["1978-01-21", "1900-04-20"]}, "Wrong status filter"
+    assert npz.read_columns(npz_path, ['phone'], where={'birth_date': (None, "1900-12-31")}) == \
+        {'phone': ["916-000-00-03", "+7(916)000-00-07"]}, "Unpacked values should be filtered too"
+    assert npz.read_columns(npz_path, ['doc_id'], where={'last_name': "Плакса", 'doc_type': False}) == \
+        {'doc_id': ["NotImplemented"]}
+    assert npz.count_by(npz_path, 'status') == {None: 1, True: 1, False: 2}, "Wrong status counts"
+    with pytest.raises(ValueError):
+        npz.read_columns(npz_path, where={'age': 5})
+
+
+def test_collection_npz(npz_path, tmp_path):
+    filtered = PatientCollection.from_npz(npz_path, where={'status': False}, storage="list")
+    assert [patient.first_name for patient in filtered] == ["Ада", "Рон"], "Wrong filtered collection"
+
+    csv_path = str(tmp_path / "DB.csv")
+    assert convert.npz_to_csv(npz_path, csv_path) == len(ROWS)
+    assert convert.csv_to_npz(csv_path, str(tmp_path / "copy.npz")) == len(ROWS)
+
+    copy = PatientCollection.from_npz(str(tmp_path / "copy.npz"))
+    assert [str(patient) for patient in copy] == [str(patient) for patient in PatientCollection(csv_path)]
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from homework.offsets import OffsetIndex
+from homework.patient import PatientCollection, Patient
+
+HEADER = "First name,Last name,Date of Birth,Phone number,Doc type,Doc number,Status\n"
+
+
+def make_row(i):
+    return f"Ада,Лавлейс,1978-01-21,+7(916)000-00-{i % 100:02d},Паспорт РФ,0228 {i:06d},Болен\n"
+
+
+@pytest.fixture()
+def csv_path(tmp_path):
+    path = tmp_path / "DB.csv"
+    path.write_text(HEADER + "".join(make_row(i) for i in range(50)), encoding='utf-8')
+    return str(path)
+
+
+def test_random_access(csv_path):
+    index = OffsetIndex(csv_path)
+    assert len(index) == 50, "Wrong number of rows in the index"
+    assert index.read_line(0).decode() == make_row(0), "Wrong first row"
+    assert index.read_line(37).decode() == make_row(37), "Wrong row"
+    assert [line.decode() for line in index.read_lines(48, 100)] == [make_row(48), make_row(49)], "Wrong rows"
+    assert os.path.exists(csv_path + ".idx"), "Index should be saved next to the file"
+
+
+def test_append_and_rewrite(csv_path):
+    OffsetIndex(csv_path).refresh()
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write(make_row(50))
+
+    index = OffsetIndex(csv_path)
+    assert len(index) == 51, "Appended row should be indexed"
+    assert index.read_line(50).decode() == make_row(50), "Wrong appended row"
+
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write(HEADER + "".join(make_row(i) for i in range(100, 160)))
+    assert len(index) == 60, "Index should be rebuilt for a rewritten file"
+    assert index.read_line(59).decode() == make_row(159), "Wrong row after rewrite"
+
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write('')
+    assert len(index) == 0, "Index should be empty for an empty file"
+
+
+def test_collection_random_access(csv_path):
+    collection = PatientCollection(csv_path, storage="file")
+    assert len(collection) == 50, "Wrong collection length"
+    assert collection[42].document_id == "0228 000042", "Wrong patient by index"
+    assert collection[-1].document_id == "0228 000049", "Wrong patient by negative index"
+
+    ids = [patient.document_id for patient in collection.slice(10, 13)]
+    assert ids == ["0228 000010", "0228 000011", "0228 000012"], "Wrong slice"
+
+    ids = [patient.document_id for patient in collection.limit(2, offset=48)]
+    assert ids == ["0228 000048", "0228 000049"], "Wrong limit with offset"
+    assert list(collection.limit(5, offset=50)) == [], "Limit after the end should be empty"
+
+    new_patient = Patient._from_trusted_row("Ада", "Лавлейс", "1978-01-21", "+7(916)000-00-50",
+                                            None, "0228 000050", None)
+    new_patient.save(csv_path)
+    assert collection[50] == new_patient, "Saved patient should be available by index"
+
+
+def check_same_rows(path, rows):
+    collection = PatientCollection(path, storage="file")
+    expected = [make_row(i).rstrip("\n") for i in rows]
+    assert len(collection) == len(rows), "len() should count records like iteration does"
+    assert [str(patient) for patient in collection] == \
+        [str(Patient._from_csv_line(line)) for line in expected], "Wrong records in iteration"
+    assert [str(patient) for patient in collection.slice(0)] == \
+        [str(patient) for patient in collection], "slice() should return every record"
+    assert [str(collection[i]) for i in range(len(rows))] == \
+        [str(patient) for patient in collection], "Indexing should match iteration"
+
+
+def test_unterminated_last_line(tmp_path):
+    path = tmp_path / "DB.csv"
+    path.write_text(HEADER + make_row(0) + make_row(1).rstrip("\n"), encoding='utf-8')
+    check_same_rows(str(path), [0, 1])
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("\n" + make_row(2))
+    check_same_rows(str(path), [0, 1, 2])
+
+
+def test_blank_lines(tmp_path):
+    path = tmp_path / "DB.csv"
+    path.write_text(HEADER + make_row(0) + "\n" + make_row(1) + "\r\n\n", encoding='utf-8')
+    check_same_rows(str(path), [0, 1])
+    assert [line.rstrip() for line in OffsetIndex(str(path)).read_lines(0)] == \
+        [make_row(0).rstrip().encode(), make_row(1).rstrip().encode()], "Blank lines should be skipped"
@@ -193,3 +193,18 @@ def test_wrong_value_assignment(patient, field, param):
 def test_save():
     patient = Patient(*GOOD_PARAMS)
     patient.save()
+
+
+@check_log_size("error")
+@check_log_size("good")
+def create_from_trusted_row():
+    return Patient._from_trusted_row("Кондрат", "Коловрат", "1978-01-31", PHONE_FORMAT,
+                                     None, PASSPORT_FORMAT, True)
+
+
+def test_from_trusted_row():
+    patient = create_from_trusted_row()
+    true_patient = Patient("Кондрат", "Коловрат", "1978-01-31", PHONE_FORMAT, PASSPORT_TYPE, PASSPORT_FORMAT)
+    true_patient.recovered()
+    assert patient == true_patient, "Wrong patient from trusted row"
+    assert not hasattr(patient, '__dict__'), "Patient should not have __dict__"
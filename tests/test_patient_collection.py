@@ -1,7 +1,10 @@
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from homework import convert
 from homework.config import PASSPORT_TYPE, CSV_PATH
 from homework.patient import PatientCollection, Patient
 from tests.constants import PATIENT_FIELDS
@@ -76,3 +79,195 @@ def test_limit_remove_records():
     with open(CSV_PATH, 'w', encoding='utf-8') as f:
         f.write('')
     assert len([_ for _ in limit]) == 0, "Limit works wrong for empty file"
+
+
+@pytest.fixture()
+def known_names():
+    return [p[0] for p in GOOD_PARAMS], [p[1] for p in GOOD_PARAMS]
+
+
+@pytest.mark.usefixtures('offline_names')
+@pytest.mark.parametrize('workers', [1, 2])
+def test_from_csv_validate(tmp_path, workers):
+    path = tmp_path / "registry.csv"
+    lines = ["First name,Last name,Date of Birth,Phone number,Doc type,Doc number,Status"]
+    for params in GOOD_PARAMS:
+        lines.append(",".join(params) + ",Болен")
+    lines.insert(3, "Ада,Лавлейс,ABCDEF,79160000002,паспорт,0228 000002,Болен")
+    lines.insert(6, "Ада,Лавлейс,1978-01-21,79160000002,паспорт,0228 000002,Здоров")
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+    collection, errors = PatientCollection.from_csv(str(path), workers=workers, chunk_size=4)
+    assert [line for line, _ in errors] == [4, 7], "Wrong lines in the error report"
+    assert isinstance(errors[0][1], ValueError), "Wrong error in the report"
+    assert len(collection) == len(GOOD_PARAMS), "Good rows should be loaded"
+    for patient, params in zip(collection, GOOD_PARAMS):
+        assert patient.first_name == params[0], "Wrong order of loaded patients"
+        assert patient.phone == "+7(916)" + params[3][4:7] + "-" + params[3][7:9] + "-" + params[3][9:], "Wrong phone"
+
+
+@pytest.mark.usefixtures('offline_names')
+def test_from_csv_workers_get_backend(tmp_path, monkeypatch):
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from homework import patient
+
+    spawn = multiprocessing.get_context('spawn')
+    monkeypatch.setattr(patient, 'ProcessPoolExecutor', functools.partial(ProcessPoolExecutor, mp_context=spawn))
+    path = tmp_path / "registry.csv"
+    lines = ["First name,Last name,Date of Birth,Phone number,Doc type,Doc number,Status"]
+    lines += [",".join(params) + ",Болен" for params in GOOD_PARAMS]
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+    collection, errors = PatientCollection.from_csv(str(path), workers=2, chunk_size=4)
+    assert errors == [], "Worker processes should check names with the parent's backend"
+    assert len(collection) == len(GOOD_PARAMS), "Good rows should be loaded"
+
+
+def stored_row(params, status="Болен"):
+    phone = params[3]
+    phone = f"+7({phone[1:4]}){phone[4:7]}-{phone[7:9]}-{phone[9:11]}"
+    return ",".join((*params[:3], phone, *params[4:], status))
+
+
+@pytest.fixture()
+def stored_csv(tmp_path):
+    path = tmp_path / "DB.csv"
+    lines = ["First name,Last name,Date of Birth,Phone number,Doc type,Doc number,Status"]
+    lines += [stored_row(params) for params in GOOD_PARAMS]
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return str(path)
+
+
+def test_columnar_storage(stored_csv):
+    usual = PatientCollection(stored_csv)
+    columnar = PatientCollection(stored_csv, storage="columnar")
+    assert len(columnar) == len(usual) == len(GOOD_PARAMS), "Wrong collection length"
+
+    for patient, true_patient in zip(columnar, usual):
+        assert str(patient) == str(true_patient), f"Wrong patient {patient} in columnar storage"
+    assert str(columnar[-1]) == str(usual[len(GOOD_PARAMS) - 1]), "Wrong negative indexing"
+
+    columnar[3].recovered()
+    columnar[4].phone = "+7-916-111-11-11"
+    columnar[5].document_type = "Водительские права"
+    assert columnar[3].document_type == PASSPORT_TYPE, "Wrong attr document_type"
+    assert "Выздоровел" in str(columnar[3]), "Status change is not stored"
+    assert columnar[4].phone == "+7(916)111-11-11", "Phone change is not stored"
+    assert columnar[5].document_type == "Водительские права", "Doc type change is not stored"
+    assert columnar[5].document_id is NotImplemented, "Doc id should be reset"
+
+
+@pytest.mark.usefixtures('offline_names')
+@pytest.mark.parametrize('storage', ["list", "columnar"])
+def test_save_all(stored_csv, tmp_path, storage, monkeypatch):
+    collection = PatientCollection(stored_csv, storage=storage)
+    copy_path = str(tmp_path / "copy.csv")
+    collection.save_all(copy_path)
+    with open(stored_csv, encoding='utf-8') as original, open(copy_path, encoding='utf-8') as copy:
+        assert original.read() == copy.read(), "Saved file differs from the original"
+
+    collection.save_all()
+    assert len(PatientCollection(stored_csv)) == len(GOOD_PARAMS), "Saved patients should not be duplicated"
+
+    def no_full_scan(self):
+        raise AssertionError("Only new patients should be read when saving")
+    monkeypatch.setattr(type(collection._storage), '__iter__', no_full_scan)
+    for params in GOOD_PARAMS[:3]:
+        collection.add(*params)
+    collection.save_all()
+    reloaded = PatientCollection(stored_csv)
+    assert len(reloaded) == len(GOOD_PARAMS) + 3, "New patients should be appended"
+    assert reloaded[len(GOOD_PARAMS)].document_id == GOOD_PARAMS[0][5], "Wrong attr document_id"
+
+
+def open_collection(stored_csv, storage, tmp_path):
+    if storage == "sqlite":
+        db_path = str(tmp_path / "DB.sqlite")
+        convert.csv_to_sqlite(stored_csv, db_path)
+        return PatientCollection(db_path, storage=storage)
+    return PatientCollection(stored_csv, storage=storage)
+
+
+@pytest.mark.usefixtures('offline_names')
+@pytest.mark.parametrize('storage', ["list", "columnar", "file", "sqlite"])
+def test_find(stored_csv, storage, tmp_path):
+    collection = open_collection(stored_csv, storage, tmp_path)
+
+    found = collection.find_by_phone("8 (916) 000-00-03")
+    assert [patient.last_name for patient in found] == ["Плакса"], "Wrong patient by phone"
+    found = collection.find_by_document(PASSPORT_TYPE, "0228000005")
+    assert [patient.last_name for patient in found] == ["Кузьмин"], "Wrong patient by document"
+    assert collection.find_by_document("Водительские права", "0228000005") == [], "Wrong doc type is ignored"
+    found = collection.find_by_last_name("ДЕМОРТ")
+    assert [patient.first_name for patient in found] == ["Вован"], "Wrong patient by last name"
+    found = collection.find_by_last_name("Ко", prefix=True)
+    assert [patient.last_name for patient in found] == ["Коловрат"], "Wrong patients by last name prefix"
+
+    patient = collection.find_by_phone("79160000003")[0]
+    patient.phone = "+7(916)999-99-99"
+    assert collection.find_by_phone("79160000003") == [], "Old phone should be removed from the index"
+    assert len(collection.find_by_phone("79169999999")) == 1, "New phone should be indexed"
+
+    collection.add("Евпатий", "Коловрат", "1972-01-11", "79160000101", PASSPORT_TYPE, "0228 000101")
+    found = collection.find_by_last_name("коловрат")
+    assert [patient.document_id for patient in found] == ["0228 000001", "0228 000101"], "New patient is not indexed"
+
+
+@pytest.mark.usefixtures('offline_names')
+@pytest.mark.parametrize('storage', ["list", "columnar"])
+def test_stats(stored_csv, storage, monkeypatch):
+    collection = PatientCollection(stored_csv, storage=storage)
+    stats = collection.stats()
+    assert stats['total'] == len(GOOD_PARAMS), "Wrong total"
+    assert stats['statuses'] == {"Болен": len(GOOD_PARAMS), "Выздоровел": 0, "Умер": 0}, "Wrong statuses"
+    assert stats['birth_decades'][1970] == 7 and stats['birth_decades'][2020] == 1, "Wrong birth decades"
+    assert stats['document_types'][PASSPORT_TYPE] == len(GOOD_PARAMS), "Wrong document types"
+
+    collection[0].recovered()
+    collection[1].dead()
+    collection[2].birth_date = "2001-01-01"
+
+    def no_full_scan(self):
+        raise AssertionError("Counters should be updated without iterating over old records")
+    monkeypatch.setattr(type(collection._storage), '__iter__', no_full_scan)
+    collection.add("Евпатий", "Коловрат", "1972-01-11", "79160000101", "Водительские права", "0228 000101")
+    stats = collection.stats()
+    assert stats['statuses'] == {"Болен": len(GOOD_PARAMS) - 1, "Выздоровел": 1, "Умер": 1}, "Wrong statuses"
+    assert stats['birth_decades'][1970] == 7 and stats['birth_decades'][2000] == 2, "Wrong birth decades"
+    assert stats['document_types']["Водительские права"] == 1, "Wrong document types"
+
+
+@pytest.mark.usefixtures('offline_names')
+def test_statistical_chart(stored_csv, tmp_path):
+    collection = PatientCollection(stored_csv)
+    assert collection.get_statistical_chart(None, 'svg').startswith(b'<?xml'), "Wrong svg chart"
+
+    with ThreadPoolExecutor(1) as executor:
+        path = collection.get_statistical_chart(str(tmp_path / "chart"), executor=executor).result()
+    assert os.path.exists(path), "Chart was not saved"
+
+
+@pytest.mark.usefixtures('offline_names')
+def test_sqlite_storage(stored_csv, tmp_path):
+    db_path = str(tmp_path / "DB.sqlite")
+    collection = open_collection(stored_csv, "sqlite", tmp_path)
+    assert len(collection) == len(GOOD_PARAMS), "Wrong collection length"
+    assert [str(patient) for patient in collection] == [str(patient) for patient in PatientCollection(stored_csv)]
+    assert [str(patient) for patient in collection.limit(2, 3)] == [str(collection[3]), str(collection[4])]
+    assert str(collection[-1]) == str(collection[len(GOOD_PARAMS) - 1]), "Wrong negative indexing"
+
+    collection[3].recovered()
+    collection[4].phone = "+7-916-111-11-11"
+    collection.add("Евпатий", "Коловрат", "1972-01-11", "79160000101", PASSPORT_TYPE, "0228 000101")
+    collection.close()
+
+    reopened = PatientCollection(db_path, storage="sqlite")
+    assert len(reopened) == len(GOOD_PARAMS) + 1, "New patient is not stored"
+    assert "Выздоровел" in str(reopened[3]), "Status change is not stored"
+    assert reopened[4].phone == "+7(916)111-11-11", "Phone change is not stored"
+    assert reopened.stats()['statuses']["Выздоровел"] == 1, "Wrong stats"
+
+    copy_path = str(tmp_path / "copy.csv")
+    assert convert.sqlite_to_csv(db_path, copy_path) == len(GOOD_PARAMS) + 1
+    assert [str(patient) for patient in PatientCollection(copy_path)] == [str(patient) for patient in reopened]
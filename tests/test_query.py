@@ -0,0 +1,49 @@
+import pytest
+
+from homework.patient import Patient, PatientCollection
+from homework.writer import PatientWriter
+
+ROWS = [("Кондрат", "Рюрик", "1971-01-11", "+7(916)000-00-00", None, "0228 000000", None),
+        ("Ада", "Лавлейс", "1978-01-21", "+7(916)000-00-02", True, "02 2800002", False),
+        ("Миртл", "Плакса", "1880-01-11", "+7(916)000-00-03", None, "0228 000003", None),
+        ("Рон", "Уизли", "1900-04-20", "+7(916)000-00-07", False, "02 28 000007", True),
+        ("Гарри", "Поттер", "1980-07-31", "+7(916)000-00-06", None, "0228 000006", None)]
+
+
+@pytest.fixture()
+def collection(tmp_path):
+    path = str(tmp_path / "DB.csv")
+    with PatientWriter(path) as writer:
+        writer.write_many(Patient._from_trusted_row(*row) for row in ROWS)
+    return PatientCollection(path, storage="file")
+
+
+def test_where_and_select(collection):
+    query = collection.query().where(status="Болен")
+    assert list(query.select("last_name")) == [("Рюрик",), ("Плакса",), ("Поттер",)], "Wrong status filter"
+    assert list(query.born_between("1970-01-01", "1979-12-31").select("first_name", "phone")) == \
+        [("Кондрат", "+7(916)000-00-00")], "Wrong birth date range"
+    assert list(query.where(last_name=lambda name: name.startswith("П")).select("last_name")) == \
+        [("Плакса",), ("Поттер",)], "Wrong function condition"
+    assert query.where(status="Умер").count() == 0, "Contradicting conditions should match nothing"
+    assert query.count() == 3, "Chained queries should not change the original"
+
+    patients = list(collection.query().where(document_type="Загран. паспорт"))
+    assert [str(patient) for patient in patients] == [str(collection[1])], "Wrong patients"
+    with pytest.raises(ValueError):
+        collection.query().where(age=5)
+
+
+def test_limit_stops_reading(collection):
+    lines = []
+
+    def source():
+        for row in ROWS:
+            lines.append(row)
+            yield Patient._from_trusted_row(*row)._to_csv_line().rstrip('\n').encode('utf-8')
+
+    query = collection.query()
+    query._source = source
+    assert len(list(query.where(status="Болен").limit(2))) == 2
+    assert len(lines) == 3, "Reading should stop as soon as the limit is reached"
+    assert list(query.limit(0)) == [], "Zero limit should read nothing"
@@ -0,0 +1,27 @@
+from homework.reader import iter_rows
+
+HEADER = "First name,Last name,Date of Birth,Phone number,Doc type,Doc number,Status\r\n"
+ROWS = ["Кондрат,Рюрик,1971-01-11,+7(916)000-00-00,Паспорт РФ,0228 000000,Болен\n",
+        "Ада,Лавлейс,1978-01-21,+7(916)000-00-02,Загран. паспорт,02 2800002,Умер\n"]
+
+
+def test_iter_rows(tmp_path):
+    path = tmp_path / "DB.csv"
+    path.write_bytes((HEADER + "".join(ROWS)).encode('utf-8'))
+
+    rows = list((row.offset, row.fields()) for row in iter_rows(str(path)))
+    assert [fields for _, fields in rows] == [row.rstrip().split(',') for row in ROWS], "Wrong fields"
+    assert rows[1][0] == len((HEADER + ROWS[0]).encode('utf-8')), "Wrong row offset"
+
+    row = next(iter_rows(str(path), start=rows[1][0]))
+    assert row[0] == "Ада" and row[-1] == "Умер" and row[-3] == "Загран. паспорт", "Wrong lazy field"
+    assert bytes(row.raw(2)) == b"1978-01-21", "Wrong raw field"
+    assert len(row) == 7, "Wrong number of fields"
+
+
+def test_iter_rows_empty(tmp_path):
+    path = tmp_path / "DB.csv"
+    path.write_text("", encoding='utf-8')
+    assert list(iter_rows(str(path))) == [], "Empty file should have no rows"
+    path.write_text(HEADER, encoding='utf-8')
+    assert list(iter_rows(str(path))) == [], "File with a header only should have no rows"
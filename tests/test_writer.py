@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from homework import writer
+from homework.patient import Patient
+from homework.writer import HEADER, PatientWriter
+
+THREADS = 8
+SAVES = 50
+
+
+def patient(worker, i):
+    return Patient._from_trusted_row("Кондрат", f"Рюрик{worker}", "1971-01-11", "+7(916)000-00-00",
+                                     None, f"{worker:04d} {i:06d}", None)
+
+
+def save_from_threads(path, worker):
+    def run(thread):
+        for i in range(SAVES):
+            patient(worker * THREADS + thread, i).save(path)
+
+    threads = [threading.Thread(target=run, args=(thread,)) for thread in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def check_file(path, workers):
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()
+    assert lines[0] == HEADER and lines.count(HEADER) == 1, "Header should be written exactly once"
+    assert sorted(lines[1:]) == sorted(patient(worker, i)._to_csv_line()
+                                       for worker in range(workers) for i in range(SAVES)), "Rows are lost or broken"
+
+
+def test_concurrent_threads(tmp_path):
+    path = str(tmp_path / "DB.csv")
+    save_from_threads(path, 0)
+    check_file(path, THREADS)
+
+
+def test_concurrent_processes(tmp_path):
+    path = str(tmp_path / "DB.csv")
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        list(executor.map(save_from_threads, [path] * 3, range(3)))
+    check_file(path, 3 * THREADS)
+
+
+def test_group_commit_batches(tmp_path, monkeypatch):
+    calls = []
+    append_lines = writer.append_lines
+    release = threading.Event()
+
+    def slow_append(filename, lines):
+        calls.append(len(lines))
+        if len(calls) == 1:
+            release.wait(5)
+        append_lines(filename, lines)
+
+    monkeypatch.setattr(writer, "append_lines", slow_append)
+    committer = writer.GroupCommit(str(tmp_path / "DB.csv"))
+    first = threading.Thread(target=committer.commit, args=(["a\n"],))
+    first.start()
+    while not calls:
+        time.sleep(0.001)
+
+    others = [threading.Thread(target=committer.commit, args=([f"{i}\n"],)) for i in range(5)]
+    for thread in others:
+        thread.start()
+    while len(committer._pending) < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [first, *others]:
+        thread.join()
+    assert calls == [1, 5], "Lines queued during a write should be committed in one batch"
+
+
+def test_group_commit_errors(tmp_path, monkeypatch):
+    def failing_append(filename, lines):
+        time.sleep(0.001)
+        raise OSError(f"{len(lines)} lines are lost")
+
+    monkeypatch.setattr(writer, "append_lines", failing_append)
+    committer = writer.GroupCommit(str(tmp_path / "DB.csv"))
+    failed = []
+
+    def commit_many():
+        for i in range(SAVES):
+            try:
+                committer.commit([f"{i}\n"])
+            except OSError:
+                failed.append(i)
+
+    threads = [threading.Thread(target=commit_many) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(failed) == THREADS * SAVES, "Every waiter of a failed batch should get its error"
+    assert committer._errors == {} and committer._waiters == {}, "Errors of finished batches should not be kept"
+
+
+def test_writer_header_on_empty_flush(tmp_path):
+    path = str(tmp_path / "DB.csv")
+    with PatientWriter(path):
+        pass
+    with PatientWriter(path) as patient_writer:
+        patient_writer.write(patient(0, 0))
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == HEADER + patient(0, 0)._to_csv_line(), "Wrong file content"
+
+
+def test_commit_error(tmp_path):
+    with pytest.raises(OSError):
+        writer.commit(str(tmp_path / "missing" / "DB.csv"), ["line\n"])